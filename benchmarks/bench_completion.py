@@ -0,0 +1,78 @@
+"""
+Benchmark - completion/complete
+Replays typing: for a sample of prompt names, one completion/complete
+request per keystroke, each prefix one character longer than the last.
+Reports the prefix index build time and per-keystroke p50/p99 latency of
+the handler at several catalog sizes, next to a linear scan over every
+name, which is what each keystroke cost without the index.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workplace_prompts.catalog import Catalog
+from workplace_prompts.completion import MAX_COMPLETIONS
+from workplace_prompts.core import Dispatcher
+from fixtures import synthetic_prompts
+
+
+def keystrokes(names, count: int, seed: int = 0):
+    """Every prefix of count randomly chosen names, as a user typing them would send"""
+    rng = random.Random(seed)
+    return [name[:length] for name in rng.sample(names, count) for length in range(1, len(name) + 1)]
+
+
+def linear_scan(names, prefix: str):
+    matches = [name for name in names if name.startswith(prefix)]
+    return matches[:MAX_COMPLETIONS], len(matches)
+
+
+def percentile(samples, fraction: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(fraction * 100) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='comma separated catalog sizes')
+    parser.add_argument('--names', type=int, default=200, help='names typed out per catalog')
+    parser.add_argument('--scan-keystrokes', type=int, default=200, help='keystrokes timed for the linear scan')
+    options = parser.parse_args()
+
+    print(f"{'prompts':>8}  {'build':>9}  {'keystrokes':>10}  {'p50':>9}  {'p99':>9}  {'per second':>10}"
+          f"  {'scan p50':>9}")
+    for size in (int(s) for s in options.sizes.split(',')):
+        catalog = Catalog(synthetic_prompts(size))
+        names = list(catalog.names())
+        started = time.perf_counter()
+        catalog.completion_index
+        build = time.perf_counter() - started
+
+        server = Dispatcher(catalog)
+        prefixes = keystrokes(names, options.names)
+        samples = []
+        for prefix in prefixes:
+            params = {"ref": {"type": "ref/prompt", "name": ""}, "argument": {"name": "name", "value": prefix}}
+            started = time.perf_counter()
+            server.handle_completion_complete(params)
+            samples.append(time.perf_counter() - started)
+
+        scans = []
+        for prefix in random.Random(1).sample(prefixes, min(options.scan_keystrokes, len(prefixes))):
+            started = time.perf_counter()
+            linear_scan(names, prefix)
+            scans.append(time.perf_counter() - started)
+
+        print(f"{size:>8}  {build * 1e3:>6.0f} ms  {len(samples):>10}  {percentile(samples, 0.5) * 1e6:>6.1f} us"
+              f"  {percentile(samples, 0.99) * 1e6:>6.1f} us  {len(samples) / sum(samples):>10.0f}"
+              f"  {statistics.median(scans) * 1e3:>6.2f} ms", flush=True)
+        del catalog, server, names
+
+
+if __name__ == '__main__':
+    main()
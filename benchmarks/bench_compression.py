@@ -0,0 +1,83 @@
+"""
+Benchmark - HTTP response compression
+Bytes on the wire and compression CPU for the list payloads and a large
+tools/call body, for each content coding available here. Static payloads
+are compressed once per catalog, so their one-off cost is reported apart
+from the per-request cost of serving them. The last table is CPU time per
+request through the HTTP app with and without Accept-Encoding.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fixtures import synthetic_prompts
+from workplace_prompts.catalog import Catalog
+from workplace_prompts.compression import ENCODINGS, MIN_COMPRESS_BYTES, compress
+
+HTTP_SERVER = os.path.join(ROOT, 'http', 'openai-workplace-prompts.py')
+
+
+def cpu_per_call(function, count: int) -> float:
+    """Mean process CPU seconds per call"""
+    started = time.process_time()
+    for _ in range(count):
+        function()
+    return (time.process_time() - started) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000', help='comma separated synthetic catalog sizes')
+    parser.add_argument('--count', type=int, default=200, help='requests per timing')
+    options = parser.parse_args()
+
+    print(f"codings available: {', '.join(ENCODINGS)}; threshold {MIN_COMPRESS_BYTES} bytes\n")
+    print(f"{'payload':>30}  {'coding':>8}  {'level':>7}  {'bytes':>10}  {'ratio':>6}  {'compress':>10}")
+    for size in (int(s) for s in options.sizes.split(',')):
+        prompts = synthetic_prompts(size)
+        payloads = {}
+        for page_size in (100, None):
+            catalog = Catalog(prompts, page_size=page_size)
+            pages = 'page' if page_size else 'all'
+            payloads[f"tools/list {size} {pages}"] = catalog.tools_list.first_page.body
+            payloads[f"prompts/list {size} {pages}"] = catalog.prompts_list.first_page.body
+        for label, body in payloads.items():
+            print(f"{label:>30}  {'identity':>8}  {'':>7}  {len(body):>10}  {1:>6.1f}  {'':>10}")
+            for coding in ENCODINGS:
+                for level, static in (('static', True), ('dynamic', False)):
+                    count = max(1, options.count // 20) if static else options.count // 4 or 1
+                    compressed = compress(body, coding, static)
+                    cost = cpu_per_call(lambda: compress(body, coding, static), count)
+                    print(f"{label:>30}  {coding:>8}  {level:>7}  {len(compressed):>10}"
+                          f"  {len(body) / len(compressed):>6.1f}  {cost * 1e3:>7.3f} ms")
+
+    spec = importlib.util.spec_from_file_location('http_server', HTTP_SERVER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    client = module.app.test_client()
+    prompts = synthetic_prompts(int(options.sizes.split(',')[-1]))
+    module.set_catalog(Catalog(prompts).warm())
+    key = next(iter(module.SERVER.catalog.records))
+
+    requests = {
+        'tools/list (precompressed)': ('/mcp/v1/tools/list', {}),
+        'tools/call 256 KB input': ('/mcp/v1/tools/call', {"name": key, "arguments": {"input": "lorem ipsum " * 21845}}),
+        'prompts/get (below threshold)': ('/mcp/v1/prompts/get', {"name": key, "arguments": {"topic": "Q4"}}),
+    }
+    print(f"\n{'request':>30}  {'coding':>8}  {'wire bytes':>10}  {'cpu/request':>12}")
+    for label, (path, body) in requests.items():
+        for coding in ('identity', *ENCODINGS):
+            headers = {'Accept-Encoding': coding}
+            wire = len(client.post(path, json=body, headers=headers).data)
+            cost = cpu_per_call(lambda: client.post(path, json=body, headers=headers), options.count)
+            print(f"{label:>30}  {coding:>8}  {wire:>10}  {cost * 1e6:>9.0f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark - dispatch overhead
+Time from a parsed request to its result, without JSON parsing or encoding:
+the old per-call handler table with split-and-probe name lookups against the
+shared core's table built once and its flat "category/name" index. The
+encoded column is the catalog fast path, which also produces the JSON bytes.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import synthetic_prompts
+from workplace_prompts.catalog import Catalog
+from workplace_prompts.core import Dispatcher
+
+
+class LegacyDispatcher:
+    """The original stdio routing: handlers rebuilt per request, names split and probed twice"""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+
+    def handle_resources_read(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        uri = params.get('uri', '')
+        if not uri.startswith('prompt://'):
+            return {"error": {"code": -32602, "message": "Invalid URI format"}}
+        path = uri.replace('prompt://', '').split('/')
+        if len(path) != 2:
+            return {"error": {"code": -32602, "message": "Invalid URI path"}}
+        category, prompt_name = path
+        if category not in self.catalog.prompts or prompt_name not in self.catalog.prompts[category]:
+            return {"error": {"code": -32602, "message": "Resource not found"}}
+        return {"contents": [{"uri": uri, "mimeType": "text/plain", "text": self.catalog.prompts[category][prompt_name]}]}
+
+    def handle_prompts_get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        path = params.get('name', '').split('/')
+        if len(path) != 2:
+            return {"error": {"code": -32602, "message": "Invalid prompt name"}}
+        category, name = path
+        if category not in self.catalog.prompts or name not in self.catalog.prompts[category]:
+            return {"error": {"code": -32602, "message": "Prompt not found"}}
+        text = self.catalog.records[f"{category}/{name}"].template.render(params.get('arguments', {}))
+        return {"messages": [{"role": "user", "content": {"type": "text", "text": text}}]}
+
+    def handle_tools_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        path = params.get('name', '').split('/')
+        if len(path) != 2:
+            return {"error": {"code": -32602, "message": "Invalid tool name"}}
+        category, name = path
+        if category not in self.catalog.prompts or name not in self.catalog.prompts[category]:
+            return {"error": {"code": -32602, "message": "Tool not found"}}
+        prompt_text = self.catalog.prompts[category][name]
+        return {"content": [{"type": "text", "text": f"{prompt_text}\n\nInput: {params['arguments'].get('input', '')}"}]}
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        handlers = {
+            'initialize': None,
+            'resources/list': None,
+            'resources/read': self.handle_resources_read,
+            'prompts/list': None,
+            'prompts/get': self.handle_prompts_get,
+            'prompts/search': None,
+            'tools/list': None,
+            'tools/call': self.handle_tools_call
+        }
+        handler = handlers.get(request.get('method', ''))
+        return {"jsonrpc": "2.0", "id": request.get('id'), "result": handler(request.get('params', {}))}
+
+
+def best_of(function, count: int, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(count):
+            function()
+        best = min(best, (time.perf_counter() - started) / count)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='20,10000,100000', help='comma separated catalog sizes')
+    parser.add_argument('--count', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    print(f"{'prompts':>8}  {'method':>15}  {'legacy':>9}  {'core':>9}  {'encoded':>9}")
+    for size in (int(s) for s in options.sizes.split(',')):
+        catalog = Catalog(synthetic_prompts(size))
+        legacy, core = LegacyDispatcher(catalog), Dispatcher(catalog)
+        key = list(catalog.records)[size // 2]
+        requests = {
+            'resources/read': {"uri": f"prompt://{key}"},
+            'prompts/get': {"name": key, "arguments": {"topic": "Q4 budget"}},
+            'tools/call': {"name": key, "arguments": {"input": "Ship it on Friday."}},
+        }
+        for method, params in requests.items():
+            request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+            timings = [
+                best_of(lambda: legacy.handle_request(request), options.count, options.repeat),
+                best_of(lambda: core.handle_request(request), options.count, options.repeat),
+                best_of(lambda: catalog.encode_result(method, params), options.count, options.repeat),
+            ]
+            print(f"{size:>8}  {method:>15}  " + "  ".join(f"{t * 1e6:>6.2f} us" for t in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark - response encoding for large tools/call results
+Compares the old dict + json.dumps + str.encode path with the fragment encoder,
+reporting time per response and peak bytes allocated while encoding and writing it
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workplace_prompts import encoding
+from workplace_prompts.catalog import Catalog, encode_response
+
+PROMPTS = {"communication-writing": {
+    "rewrite-for-clarity": "Rewrite the following text so it is easier to understand. Text: [paste text]."
+}}
+TOOL = "communication-writing/rewrite-for-clarity"
+
+
+def legacy_write(catalog: Catalog, message: dict, stream):
+    """The original stdio path: f-string result, json.dumps, then print's str encode"""
+    params = message["params"]
+    category, name = params["name"].split('/')
+    prompt_text = catalog.prompts[category][name]
+    user_input = params["arguments"].get('input', '')
+    response = {
+        "jsonrpc": "2.0",
+        "id": message.get('id'),
+        "result": {"content": [{"type": "text", "text": f"{prompt_text}\n\nInput: {user_input}"}]}
+    }
+    stream.write((json.dumps(response) + '\n').encode('utf-8'))
+    stream.flush()
+
+
+def fragment_write(catalog: Catalog, message: dict, stream):
+    """The shared encoder: pre-encoded prompt text, escaped input, one writev"""
+    parts = encode_response(message, catalog.encode_result)
+    parts.append(encoding.NEWLINE)
+    encoding.write_parts(stream, parts)
+
+
+def measure(write, catalog: Catalog, message: dict, stream, repeat: int):
+    write(catalog, message, stream)
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        write(catalog, message, stream)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    write(catalog, message, stream)
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes-mb', default='1,4,16', help='comma separated input sizes in MB')
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    backends = ['json'] + (['orjson'] if encoding.orjson is not None else [])
+    orjson_module = encoding.orjson
+    catalog = Catalog(PROMPTS)
+
+    print(f"{'input':>6}  {'path':>16}  {'time':>10}  {'peak alloc':>12}")
+    with open(os.devnull, 'wb') as stream:
+        for size_mb in (int(s) for s in options.sizes_mb.split(',')):
+            # Mixed ASCII, quotes, newlines and non-ASCII so escaping does real work
+            text = ('Quarterly "numbers" are in.\nRésumé attached. ' * (size_mb * 1024 * 1024 // 47 + 1))
+            message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                       "params": {"name": TOOL, "arguments": {"input": text[:size_mb * 1024 * 1024]}}}
+
+            encoding.orjson = None
+            seconds, allocated = measure(legacy_write, catalog, message, stream, options.repeat)
+            print(f"{size_mb:>4}MB  {'dumps + encode':>16}  {seconds * 1e3:>7.2f} ms  {allocated / 1e6:>9.2f} MB")
+            for backend in backends:
+                encoding.orjson = orjson_module if backend == 'orjson' else None
+                seconds, allocated = measure(fragment_write, catalog, message, stream, options.repeat)
+                label = f"fragments/{backend}"
+                print(f"{size_mb:>4}MB  {label:>16}  {seconds * 1e3:>7.2f} ms  {allocated / 1e6:>9.2f} MB")
+            encoding.orjson = orjson_module
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark - HTTP streaming of large responses
+Time to first byte, total time and worker peak memory for a tools/call that
+echoes a multi-megabyte input, as JSON from the per-method route and from
+/mcp/v1, and as Server-Sent Events from /mcp/v1. Each case runs against a
+fresh production-mode server with one worker so its peak RSS is its own.
+Point --server at another checkout's HTTP server to compare against it.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, 'http', 'openai-workplace-prompts.py')
+
+TOOL = "communication-writing/rewrite-for-clarity"
+
+CASES = {
+    'route json': ('/mcp/v1/tools/call', 'application/json', False),
+    'rpc json': ('/mcp/v1', 'application/json', True),
+    'rpc sse': ('/mcp/v1', 'application/json, text/event-stream', True),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def rss_kb(pid: int) -> Dict[str, int]:
+    values = {}
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                values[line.split(':')[0]] = int(line.split()[1])
+    return values
+
+
+def worker_pid(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            pids = children.read().split()
+    except OSError:
+        return None
+    return int(pids[0]) if pids else None
+
+
+def timed_request(port: int, path: str, body: bytes, accept: str):
+    """Seconds to the first body byte and to the last, and the body size"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    started = time.perf_counter()
+    connection.request('POST', path, body, {'Content-Type': 'application/json', 'Accept': accept})
+    response = connection.getresponse()
+    first = response.read(1)
+    first_byte = time.perf_counter() - started
+    size = len(first) + len(response.read())
+    total = time.perf_counter() - started
+    connection.close()
+    return first_byte, total, size
+
+
+def run_case(server: str, path: str, body: bytes, accept: str, requests: int) -> List[float]:
+    port = free_port()
+    process = subprocess.Popen([sys.executable, server, '--production', '--host', '127.0.0.1', '--port', str(port),
+                                '--workers', '1', '--threads', '1', '--reload-interval', '0'],
+                               stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                timed_request(port, '/mcp/v1/initialize', b'{}', 'application/json')
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        worker = worker_pid(process.pid)
+        baseline = rss_kb(worker)['VmRSS'] if worker else 0
+        firsts, totals = [], []
+        for _ in range(requests):
+            first_byte, total, size = timed_request(port, path, body, accept)
+            firsts.append(first_byte)
+            totals.append(total)
+        peak = rss_kb(worker)['VmHWM'] - baseline if worker else float('nan')
+        return [min(firsts), min(totals), size, peak]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--server', default=SERVER, help='HTTP server script to run')
+    parser.add_argument('--input-mb', type=float, default=8.0, help='size of the tools/call input')
+    parser.add_argument('--requests', type=int, default=3)
+    options = parser.parse_args()
+
+    text = "Quarterly numbers, draft two.\n" * int(options.input_mb * 1024 * 1024 / 30)
+    print(f"{'case':>12}  {'first byte':>11}  {'total':>9}  {'bytes':>10}  {'peak growth':>12}")
+    for label, (path, accept, rpc) in CASES.items():
+        params = {"name": TOOL, "arguments": {"input": text}}
+        message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": params} if rpc else params
+        first_byte, total, size, peak = run_case(options.server, path, json.dumps(message).encode('utf-8'),
+                                                 accept, options.requests)
+        print(f"{label:>12}  {first_byte * 1e3:>8.1f} ms  {total * 1e3:>6.1f} ms  {size:>10}  {peak / 1024:>8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
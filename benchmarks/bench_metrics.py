@@ -0,0 +1,85 @@
+"""
+Benchmark - request metrics overhead
+Times Metrics.enter/observe on their own, then the stdio server's per-line
+path for cheap requests with metrics recording and with it switched off
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from workplace_prompts.metrics import Metrics
+
+STDIO_SERVER = os.path.join(ROOT, 'stdio', 'openai-workplace-prompts.py')
+
+LINES = {
+    'initialize': {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+    'prompts/get': {"jsonrpc": "2.0", "id": 1, "method": "prompts/get",
+                    "params": {"name": "communication-writing/write-professional-email",
+                               "arguments": {"recipient": "Sarah", "topic": "Q4 budget"}}},
+    'tools/list': {"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}},
+}
+
+
+class DisabledMetrics(Metrics):
+    """Same interface, records nothing"""
+
+    def enter(self) -> float:
+        return 0.0
+
+    def observe(self, method, started, request_bytes, response_bytes, codes=()):
+        pass
+
+
+def best_of(function, count: int, repeat: int) -> float:
+    """Best mean seconds per call over repeat runs of count calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(count):
+            function()
+        best = min(best, (time.perf_counter() - started) / count)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    metrics = Metrics()
+
+    def record():
+        metrics.observe('prompts/get', metrics.enter(), 180, 420, ())
+
+    def record_error():
+        metrics.observe('prompts/get', metrics.enter(), 180, 420, (-32602,))
+
+    print(f"enter + observe:           {best_of(record, options.count, options.repeat) * 1e9:8.0f} ns")
+    print(f"enter + observe, 1 error:  {best_of(record_error, options.count, options.repeat) * 1e9:8.0f} ns")
+
+    spec = importlib.util.spec_from_file_location('stdio_server', STDIO_SERVER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    server = module.MCPServer()
+
+    print(f"\n{'method':>12}  {'off':>9}  {'on':>9}  {'overhead':>9}")
+    for method, message in LINES.items():
+        line = json.dumps(message).encode('utf-8')
+        timings = []
+        for recorder in (DisabledMetrics(), Metrics()):
+            server.metrics = recorder
+            timings.append(best_of(lambda: server.respond_parts(line), options.count, options.repeat))
+        off, on = timings
+        print(f"{method:>12}  {off * 1e6:>6.2f} us  {on * 1e6:>6.2f} us  {(on - off) * 1e9:>6.0f} ns")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark - paginated list methods
+Page latency for first, middle and last pages across catalog sizes; it should stay flat
+"""
+
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workplace_prompts.catalog import Catalog, DEFAULT_PAGE_SIZE, encode_cursor
+from fixtures import synthetic_prompts
+
+
+def per_call(func, repeat: int) -> float:
+    number = 200
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='20,1000,10000,100000',
+                        help='comma separated catalog sizes')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    print(f"{'prompts':>8}  {'build':>9}  {'first page':>11}  {'middle page':>12}  {'last page':>10}")
+    for size in (int(s) for s in options.sizes.split(',')):
+        catalog = Catalog(synthetic_prompts(size), page_size=options.page_size)
+        started = time.perf_counter()
+        index = catalog.tools_list
+        build = time.perf_counter() - started
+
+        pages = max(1, -(-size // options.page_size))
+        middle = encode_cursor(index.tag, (pages // 2) * options.page_size) if pages > 1 else None
+        last = encode_cursor(index.tag, (pages - 1) * options.page_size) if pages > 1 else None
+
+        first_time = per_call(lambda: index.page(None).body, options.repeat)
+        middle_time = per_call(lambda: index.page(middle).body, options.repeat)
+        last_time = per_call(lambda: index.page(last).body, options.repeat)
+        print(f"{size:>8}  {build * 1e3:>6.1f} ms  {first_time * 1e6:>8.1f} us"
+              f"  {middle_time * 1e6:>9.1f} us  {last_time * 1e6:>7.1f} us")
+
+
+if __name__ == '__main__':
+    main()
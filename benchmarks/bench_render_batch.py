@@ -0,0 +1,73 @@
+"""
+Benchmark - prompts/renderBatch
+Rows per second for one prompt rendered against N argument maps: a loop of
+prompts/get requests through the stdio server against a single streamed
+prompts/renderBatch request. Also reports the peak memory allocated while
+the batch streams from lazily produced rows, which should stay flat as N grows.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from workplace_prompts.core import render_rows
+from workplace_prompts.encoding import NEWLINE, dumps
+
+STDIO_SERVER = os.path.join(ROOT, 'stdio', 'openai-workplace-prompts.py')
+
+PROMPT = 'communication-writing/write-professional-email'
+
+
+def rows(count: int) -> Iterator[Dict[str, Any]]:
+    for i in range(count):
+        yield {"recipient": f"Customer {i}", "topic": f"order #{100000 + i}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma separated batch sizes')
+    options = parser.parse_args()
+
+    spec = importlib.util.spec_from_file_location('stdio_server', STDIO_SERVER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    server = module.MCPServer()
+    record = server.catalog.record(PROMPT)
+
+    print(f"{'rows':>8}  {'get loop':>12}  {'renderBatch':>12}  {'peak memory':>12}")
+    for size in (int(s) for s in options.sizes.split(',')):
+        lines = [json.dumps({"jsonrpc": "2.0", "id": 1, "method": "prompts/get",
+                             "params": {"name": PROMPT, "arguments": arguments}}).encode('utf-8')
+                 for arguments in rows(size)]
+        started = time.perf_counter()
+        for line in lines:
+            server.respond_parts(line)
+        get_rate = size / (time.perf_counter() - started)
+
+        line = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "prompts/renderBatch",
+                           "params": {"name": PROMPT, "arguments": list(rows(size))}}).encode('utf-8')
+        started = time.perf_counter()
+        for _ in server.respond_parts(line):
+            pass
+        batch_rate = size / (time.perf_counter() - started)
+
+        # Rows produced on demand, as an NDJSON request body supplies them
+        tracemalloc.start()
+        for _ in render_rows(record, rows(size), b'', NEWLINE, lambda summary: [dumps(summary), NEWLINE]):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"{size:>8}  {get_rate:>8.0f} r/s  {batch_rate:>8.0f} r/s  {peak / 1024:>9.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark - result cache
+Time per prompts/get and tools/call request on the HTTP fast path for a
+client that accepts gzip, with and without the result cache, for
+arguments of several sizes. Without the cache every body of 1 KiB or more
+is rendered and compressed; a hit reuses the compressed copy kept with
+the entry. Each request is parsed from its JSON line, as the server does,
+so argument strings are fresh objects that must be hashed. Requests cycle
+over a fixed set of distinct argument maps, so once the cache is warm
+every request is a hit; a skewed workload over more argument maps than
+fit shows the hit rate and evictions under a byte budget.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workplace_prompts.cache import ResultCache
+from workplace_prompts.compression import MIN_COMPRESS_BYTES, compress
+from workplace_prompts.core import Dispatcher
+from workplace_prompts.encoding import join
+
+NAME = "meetings-collaboration/summarize-meeting-notes"
+
+
+def requests_for(method: str, text_bytes: int, distinct: int):
+    argument = 'paste text' if method == 'prompts/get' else 'input'
+    return [json.dumps({"jsonrpc": "2.0", "id": i, "method": method,
+                        "params": {"name": NAME, "arguments": {argument: f"notes {i} " + 'x' * text_bytes}}})
+            for i in range(distinct)]
+
+
+def per_request(respond, requests, count: int) -> float:
+    for line in requests:
+        respond(json.loads(line))
+    started = time.perf_counter()
+    for i in range(count):
+        respond(json.loads(requests[i % len(requests)]))
+    return (time.perf_counter() - started) / count
+
+
+def gzipped(server: Dispatcher):
+    """fast_result_response for a client that accepts gzip, without Flask around it"""
+    def respond(message):
+        entry, result = server.cached_result(message['method'], message['params'])
+        if entry is not None:
+            return server.compressed_result(entry, 'gzip')
+        body = join(result)
+        return compress(body, 'gzip') if len(body) >= MIN_COMPRESS_BYTES else body
+    return respond
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='20,2000,20000', help='comma separated argument lengths in bytes')
+    parser.add_argument('--distinct', type=int, default=100, help='distinct argument maps per run')
+    parser.add_argument('--count', type=int, default=50000)
+    parser.add_argument('--cache-bytes', type=int, default=64 * 1024 * 1024)
+    options = parser.parse_args()
+
+    print(f"{'method':>12}  {'arg bytes':>9}  {'uncached':>9}  {'cached':>9}  {'speedup':>7}")
+    for method in ('prompts/get', 'tools/call'):
+        for size in (int(s) for s in options.sizes.split(',')):
+            requests = requests_for(method, size, options.distinct)
+            uncached, cached = (per_request(gzipped(Dispatcher(cache=cache)), requests, options.count)
+                                for cache in (None, ResultCache(options.cache_bytes)))
+            print(f"{method:>12}  {size:>9}  {uncached * 1e6:>6.1f} us  {cached * 1e6:>6.1f} us"
+                  f"  {uncached / cached:>6.1f}x")
+
+    # Zipf-like reuse over ten times more argument maps than the budget holds
+    requests = requests_for('prompts/get', 2000, 10000)
+    budget = 1000 * 2500
+    server = Dispatcher(cache=ResultCache(budget))
+    respond = gzipped(server)
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) for rank in range(len(requests))]
+    started = time.perf_counter()
+    for line in rng.choices(requests, weights, k=options.count):
+        respond(json.loads(line))
+    elapsed = (time.perf_counter() - started) / options.count
+    stats = server.metrics.snapshot()['cache']
+    print(f"\nskewed gzipped prompts/get over {len(requests)} argument maps, {budget // 1024} KiB budget: "
+          f"{elapsed * 1e6:.2f} us/request, hit rate {stats['hits'] / options.count:.1%}, "
+          f"{stats['evictions']} evictions, {stats['entries']} entries")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark - prompts/search
+Index build time and query latency at several catalog sizes; rare-term queries
+should stay flat because they only touch a few postings
+"""
+
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workplace_prompts.catalog import Catalog
+from fixtures import synthetic_prompts
+
+QUERIES = {
+    "rare term": "code7",
+    "rare + common": "code7 budget",
+    "common term": "stakeholder",
+    "category": "meetings collaboration",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='comma separated catalog sizes')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    header = ''.join(f"  {label:>14}" for label in QUERIES)
+    print(f"{'prompts':>8}  {'index build':>11}{header}")
+    for size in (int(s) for s in options.sizes.split(',')):
+        catalog = Catalog(synthetic_prompts(size))
+        catalog.prompts_list
+        started = time.perf_counter()
+        catalog.search_index
+        build = time.perf_counter() - started
+
+        timings = []
+        for query in QUERIES.values():
+            number = 20
+            seconds = min(timeit.repeat(lambda: catalog.search(query, options.limit),
+                                        number=number, repeat=options.repeat)) / number
+            timings.append(seconds)
+        row = ''.join(f"  {seconds * 1e3:>11.3f} ms" for seconds in timings)
+        print(f"{size:>8}  {build:>9.2f} s{row}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark - cold start
+Saves synthetic catalogs of each size as JSON, as a SQLite store and as a
+snapshot, then launches a fresh server against each and reports the time
+from starting the process to receiving its first initialize response,
+along with peak RSS at that point. Every case is started --runs times and
+the median is reported. stdio is what MCP clients spawn per session; http
+starts production mode with one worker, which warms the catalog before
+forking whatever the format.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_transports import TRANSPORTS, peak_rss_kb
+from fixtures import synthetic_prompts
+from workplace_prompts.snapshot import write_snapshot
+from workplace_prompts.store import SQLiteCatalog, write_store
+
+
+def write_catalogs(directory: str, size: int, formats) -> dict:
+    """Save a synthetic catalog of size prompts in each format, returning their paths
+
+    The snapshot is built from the SQLite store, so a million-prompt
+    catalog never has to be held in memory whole.
+    """
+    prompts = synthetic_prompts(size)
+    paths = {}
+    started = time.perf_counter()
+    if 'json' in formats:
+        paths['json'] = os.path.join(directory, f'{size}.json')
+        with open(paths['json'], 'w', encoding='utf-8') as f:
+            json.dump(prompts, f)
+    store = os.path.join(directory, f'{size}.sqlite')
+    write_store(store, prompts)
+    del prompts
+    if 'store' in formats:
+        paths['store'] = store
+    if 'snapshot' in formats:
+        paths['snapshot'] = os.path.join(directory, f'{size}.snapshot')
+        write_snapshot(paths['snapshot'], SQLiteCatalog(store))
+    if 'store' not in formats:
+        os.unlink(store)
+    print(f"wrote {size} prompts as {', '.join(paths)} in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return paths
+
+
+def time_to_initialize(transport: str, path: str, options, timeout: float):
+    """Seconds from launch to the first initialize response, and peak RSS then"""
+    client = TRANSPORTS[transport](path, options)
+    try:
+        ready = client.wait_ready() if transport == 'stdio' else client.wait_ready(timeout)
+        return ready, peak_rss_kb(client.pids())
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='20,10000,1000000', help='comma separated catalog sizes')
+    parser.add_argument('--formats', default='json,store,snapshot', help='comma separated catalog formats')
+    parser.add_argument('--transports', default='stdio', help="comma separated: stdio, http")
+    parser.add_argument('--runs', type=int, default=5, help='launches per case')
+    parser.add_argument('--warmup', action='store_true', help='start the servers with --warmup')
+    parser.add_argument('--timeout', type=float, default=600.0, help='seconds to wait for an HTTP server')
+    options = parser.parse_args()
+    formats = options.formats.split(',')
+    server_options = ['--warmup'] if options.warmup else []
+
+    print(f"{'transport':>9}  {'prompts':>8}  {'format':>8}  {'median':>9}  {'min':>9}  {'peak RSS':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(s) for s in options.sizes.split(',')):
+            paths = write_catalogs(directory, size, formats)
+            for transport in options.transports.split(','):
+                for catalog_format, path in paths.items():
+                    samples = []
+                    rss = None
+                    for _ in range(options.runs):
+                        seconds, rss = time_to_initialize(transport, path, server_options, options.timeout)
+                        samples.append(seconds)
+                    rss_text = f"{rss / 1024:>6.0f} MB" if rss else f"{'n/a':>9}"
+                    print(f"{transport:>9}  {size:>8}  {catalog_format:>8}  {statistics.median(samples) * 1e3:>6.0f} ms"
+                          f"  {min(samples) * 1e3:>6.0f} ms  {rss_text}", flush=True)
+            for path in paths.values():
+                os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
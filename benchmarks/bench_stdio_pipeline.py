@@ -0,0 +1,65 @@
+"""
+Benchmark - stdio throughput with pipelined input
+Pipes a burst of requests into the stdio server and compares the serial loop with --async
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'stdio', 'openai-workplace-prompts.py')
+
+SMALL_REQUESTS = [
+    ("resources/list", {}),
+    ("prompts/get", {"name": "communication-writing/write-professional-email",
+                     "arguments": {"recipient": "Sarah", "topic": "Q4 budget"}}),
+    ("resources/read", {"uri": "prompt://meetings-collaboration/create-meeting-agenda"}),
+    ("tools/call", {"name": "meetings-collaboration/summarize-meeting-notes",
+                    "arguments": {"input": "Decided to ship on Friday."}}),
+]
+
+
+def build_input(count: int, large_every: int, large_bytes: int) -> bytes:
+    lines = []
+    for i in range(count):
+        if large_every and i % large_every == 0:
+            method, params = "tools/call", {"name": "communication-writing/rewrite-for-clarity",
+                                            "arguments": {"input": "x" * large_bytes}}
+        else:
+            method, params = SMALL_REQUESTS[i % len(SMALL_REQUESTS)]
+        lines.append(json.dumps({"jsonrpc": "2.0", "id": i, "method": method, "params": params}))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def run_server(extra_args, payload: bytes, expected: int) -> float:
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, SERVER, *extra_args], input=payload,
+                            stdout=subprocess.PIPE, check=True)
+    elapsed = time.perf_counter() - started
+    ids = {json.loads(line)["id"] for line in result.stdout.splitlines()}
+    assert len(ids) == expected, f"expected {expected} responses, got {len(ids)}"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--large-every', type=int, default=500,
+                        help='every Nth request is a tools/call with a large input (0 for none)')
+    parser.add_argument('--large-bytes', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    payload = build_input(options.requests, options.large_every, options.large_bytes)
+    print(f"{options.requests} pipelined requests, {len(payload) / 1e6:.1f} MB of input")
+    for label, extra_args in (("serial loop", []), ("--async", ["--async"])):
+        elapsed = min(run_server(extra_args, payload, options.requests) for _ in range(options.repeat))
+        print(f"{label:>12}: {elapsed:6.3f} s  {options.requests / elapsed:>9.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
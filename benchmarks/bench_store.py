@@ -0,0 +1,109 @@
+"""
+Benchmark - SQLite catalog store vs the in-memory table
+For synthetic catalogs of each size, loads the same prompts from a JSON file
+(everything in memory) and from a SQLite store (metadata in memory, text in
+an LRU) in a fresh process each, and reports load time, resident memory and
+prompts/get latency. Random reads spread over the whole catalog, so on the
+store they mostly miss the LRU and go to SQLite; hot reads cycle over a few
+prompts and are served from it.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fixtures import synthetic_prompts
+
+HOT_PROMPTS = 100
+
+
+def rss_mb() -> float:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def percentiles(latencies) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {"p50": ordered[len(ordered) // 2] * 1e6, "p99": ordered[int(len(ordered) * 0.99)] * 1e6}
+
+
+def child(path: str, reads: int) -> Dict[str, Any]:
+    """Load the catalog at path and time prompts/get against it, in this process"""
+    from workplace_prompts.core import Dispatcher
+    from workplace_prompts.loader import load_catalog
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    catalog = load_catalog(path)
+    load_seconds = time.perf_counter() - started
+    loaded = rss_mb() - baseline
+
+    server = Dispatcher(catalog)
+    names = [f"{category}/{name}" for category, name, _, _ in catalog.metadata()]
+    rng = random.Random(0)
+    results = {"load": load_seconds, "rss": loaded}
+    for label, pick in (('random', lambda i: rng.choice(names)), ('hot', lambda i: names[i % HOT_PROMPTS])):
+        latencies = []
+        for i in range(reads):
+            message = {"jsonrpc": "2.0", "id": i, "method": "prompts/get",
+                       "params": {"name": pick(i), "arguments": {"topic": "Q4"}}}
+            started = time.perf_counter()
+            server.respond_encoded(message)
+            latencies.append(time.perf_counter() - started)
+        results[label] = percentiles(latencies)
+    results["rss_after"] = rss_mb() - baseline
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000', help='comma separated catalog sizes')
+    parser.add_argument('--text-bytes', type=int, default=2000, help='approximate length of each prompt')
+    parser.add_argument('--reads', type=int, default=20000, help='prompts/get requests per pattern')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        print(json.dumps(child(options.child, options.reads)))
+        return
+
+    from workplace_prompts.store import write_store
+
+    print(f"{'prompts':>8}  {'backend':>7}  {'load':>8}  {'RSS':>9}  {'after reads':>11}"
+          f"  {'random p50/p99':>16}  {'hot p50/p99':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(s) for s in options.sizes.split(',')):
+            prompts = synthetic_prompts(size)
+            for category_prompts in prompts.values():
+                for name, text in category_prompts.items():
+                    category_prompts[name] = (text + ' ') * max(1, options.text_bytes // (len(text) + 1))
+            paths = {'json': os.path.join(directory, f'{size}.json'), 'sqlite': os.path.join(directory, f'{size}.sqlite')}
+            with open(paths['json'], 'w', encoding='utf-8') as f:
+                json.dump(prompts, f)
+            write_store(paths['sqlite'], prompts)
+            del prompts
+
+            for backend, path in paths.items():
+                output = subprocess.run([sys.executable, __file__, '--child', path, '--reads', str(options.reads)],
+                                        capture_output=True, check=True, text=True).stdout
+                result = json.loads(output)
+                print(f"{size:>8}  {backend:>7}  {result['load']:>6.2f} s  {result['rss']:>6.0f} MB"
+                      f"  {result['rss_after']:>8.0f} MB"
+                      f"  {result['random']['p50']:>6.1f}/{result['random']['p99']:>6.1f} us"
+                      f"  {result['hot']['p50']:>5.1f}/{result['hot']['p99']:>5.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark - prompt template rendering
+Compares the per-argument str.replace loop against compiled single-pass rendering
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workplace_prompts.templates import CompiledTemplate
+
+TEMPLATE = (
+    "Reframe this message for [audience type: executives, peers, or customers]. "
+    "The message was originally written for [context]. Adjust tone, word choice, "
+    "and style to fit the intended audience. Text: [paste text]."
+)
+
+
+def replace_loop(template: str, arguments: dict) -> str:
+    """The original rendering loop: one full scan and copy per argument"""
+    prompt_text = template
+    for key, value in arguments.items():
+        prompt_text = prompt_text.replace(f'[{key}]', str(value))
+    return prompt_text
+
+
+def make_arguments(input_size: int, extra: int) -> dict:
+    """Large pasted text first, so every later replace rescans it"""
+    arguments = {"paste text": "x" * input_size}
+    arguments["audience type: executives, peers, or customers"] = "executives"
+    arguments["context"] = "the engineering team"
+    for i in range(extra):
+        arguments[f"unused-{i}"] = "value"
+    return arguments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,100000,1000000,10000000',
+                        help='comma separated pasted input sizes in characters')
+    parser.add_argument('--extra-args', type=int, default=5,
+                        help='arguments that match no slot (each still costs a scan)')
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    compiled = CompiledTemplate(TEMPLATE)
+    print(f"{'input':>10}  {'replace loop':>14}  {'compiled':>12}  {'speedup':>8}")
+    for size in (int(s) for s in options.sizes.split(',')):
+        arguments = make_arguments(size, options.extra_args)
+        assert replace_loop(TEMPLATE, arguments) == compiled.render(arguments)
+
+        number = max(1, 2_000_000 // max(size, 1))
+        loop_time = min(timeit.repeat(lambda: replace_loop(TEMPLATE, arguments),
+                                      number=number, repeat=options.repeat)) / number
+        compiled_time = min(timeit.repeat(lambda: compiled.render(arguments),
+                                          number=number, repeat=options.repeat)) / number
+        print(f"{size:>10}  {loop_time * 1e6:>11.2f} us  {compiled_time * 1e6:>9.2f} us"
+              f"  {loop_time / compiled_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""
+Benchmark - transport-level regression suite
+Runs the stdio server as a subprocess over pipes and the HTTP server in
+production mode over loopback against synthetic catalogs of several sizes.
+Records startup time, then throughput, p50/p95/p99 latency and peak RSS for
+every method, and writes the results as JSON. Every warm-up response is
+checked for the method's result, so a server answering with errors fails
+the run instead of timing them. With --baseline it compares against an
+earlier results file and exits non-zero on regressions.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fixtures import synthetic_prompts
+from workplace_prompts import encoding
+from workplace_prompts.prompts import PROMPTS
+
+STDIO_SERVER = os.path.join(ROOT, 'stdio', 'openai-workplace-prompts.py')
+HTTP_SERVER = os.path.join(ROOT, 'http', 'openai-workplace-prompts.py')
+
+# For each metric, whether a larger value is better
+METRICS = {
+    'startup_s': False,
+    'throughput_rps': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'peak_rss_kb': False,
+}
+
+
+# Key that every successful result of each method carries
+RESULT_KEYS = {
+    'initialize': 'protocolVersion',
+    'resources/list': 'resources',
+    'resources/read': 'contents',
+    'prompts/list': 'prompts',
+    'prompts/get': 'messages',
+    'prompts/search': 'prompts',
+    'tools/list': 'tools',
+    'tools/call': 'content',
+}
+
+
+def method_params(prompts: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+    """Parameters for one representative call of each method against prompts"""
+    category = next(iter(prompts))
+    name = next(iter(prompts[category]))
+    key = f"{category}/{name}"
+    return {
+        'initialize': {},
+        'resources/list': {},
+        'resources/read': {"uri": f"prompt://{key}"},
+        'prompts/list': {},
+        'prompts/get': {"name": key, "arguments": {"recipient": "the team", "topic": "the launch"}},
+        'prompts/search': {"query": "meeting summary report"},
+        'tools/list': {},
+        'tools/call': {"name": key, "arguments": {"input": "Please tighten up this paragraph."}},
+    }
+
+
+def check_result(method: str, result: Any) -> Optional[str]:
+    """What is wrong with result as an answer to method, or None if nothing is"""
+    if not isinstance(result, dict):
+        return "not an object"
+    if 'error' in result:
+        return f"error {json.dumps(result['error'])}"
+    if RESULT_KEYS[method] not in result:
+        return f"no {RESULT_KEYS[method]!r} in the result"
+    return None
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(latencies: List[float], elapsed: float, peak_rss_kb: Optional[int]) -> Dict[str, Any]:
+    samples = sorted(latencies)
+    return {
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(samples, 0.50) * 1e3, 4),
+        'p95_ms': round(percentile(samples, 0.95) * 1e3, 4),
+        'p99_ms': round(percentile(samples, 0.99) * 1e3, 4),
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+def peak_rss_kb(pids: List[int]) -> Optional[int]:
+    """Largest VmHWM among pids, from /proc; None where that isn't available"""
+    peaks = []
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        peaks.append(int(line.split()[1]))
+        except OSError:
+            pass
+    return max(peaks) if peaks else None
+
+
+def child_pids(pid: int) -> List[int]:
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+class StdioClient:
+    """One stdio server subprocess, driven a request at a time"""
+
+    def __init__(self, catalog_path: Optional[str], options: Sequence[str] = ()):
+        command = [sys.executable, STDIO_SERVER, '--reload-interval', '0', *options]
+        if catalog_path:
+            command += ['--catalog', catalog_path]
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.next_id = 0
+
+    def call(self, method: str, params: Dict[str, Any]) -> bytes:
+        self.next_id += 1
+        line = json.dumps({"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params})
+        self.process.stdin.write(line.encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        return self.process.stdout.readline()
+
+    @staticmethod
+    def result(body: bytes) -> Any:
+        """The result a response line carries, or the whole message if it has none"""
+        message = json.loads(body)
+        return message.get('result', message) if isinstance(message, dict) else message
+
+    def wait_ready(self) -> float:
+        self.call('initialize', {})
+        return time.perf_counter() - self.started
+
+    def pids(self) -> List[int]:
+        return [self.process.pid]
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+class HttpClient:
+    """One HTTP server subprocess in production mode, driven over a keep-alive connection"""
+
+    def __init__(self, catalog_path: Optional[str], options: Sequence[str] = ()):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        command = [sys.executable, HTTP_SERVER, '--production', '--host', '127.0.0.1',
+                   '--port', str(self.port), '--workers', '1', '--threads', '4', '--reload-interval', '0', *options]
+        if catalog_path:
+            command += ['--catalog', catalog_path]
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+        self.connection = None
+
+    def call(self, method: str, params: Dict[str, Any]) -> bytes:
+        self.connection.request('POST', '/mcp/v1/' + method, json.dumps(params).encode('utf-8'),
+                                {'Content-Type': 'application/json'})
+        return self.connection.getresponse().read()
+
+    @staticmethod
+    def result(body: bytes) -> Any:
+        """The per-method routes answer with the bare result, or an error object"""
+        return json.loads(body)
+
+    def wait_ready(self, timeout: float = 60.0) -> float:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+                self.call('initialize', {})
+                return time.perf_counter() - self.started
+            except OSError:
+                self.connection.close()
+                time.sleep(0.01)
+        raise RuntimeError(f"HTTP server on port {self.port} did not start within {timeout:.0f}s")
+
+    def pids(self) -> List[int]:
+        return [self.process.pid, *child_pids(self.process.pid)]
+
+    def close(self):
+        self.connection.close()
+        self.process.terminate()
+        self.process.wait()
+
+
+TRANSPORTS = {'stdio': StdioClient, 'http': HttpClient}
+
+
+def run_case(transport: str, size: str, catalog_path: Optional[str], prompts, requests: int) -> List[Dict[str, Any]]:
+    client = TRANSPORTS[transport](catalog_path)
+    records = []
+    try:
+        startup = client.wait_ready()
+        records.append({'transport': transport, 'size': size, 'method': 'startup',
+                        'startup_s': round(startup, 4), 'peak_rss_kb': peak_rss_kb(client.pids())})
+
+        for method, params in method_params(prompts).items():
+            for _ in range(min(50, requests)):
+                body = client.call(method, params)
+                try:
+                    problem = check_result(method, client.result(body))
+                except ValueError:
+                    problem = "not JSON"
+                if problem is not None:
+                    raise ValueError(f"{method}: {problem}: {body[:200]!r}")
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(requests):
+                sent = time.perf_counter()
+                client.call(method, params)
+                latencies.append(time.perf_counter() - sent)
+            elapsed = time.perf_counter() - started
+            records.append({'transport': transport, 'size': size, 'method': method,
+                            **summarize(latencies, elapsed, peak_rss_kb(client.pids()))})
+    finally:
+        client.close()
+    return records
+
+
+def record_key(record: Dict[str, Any]) -> str:
+    return f"{record['transport']}/{record['size']}/{record['method']}"
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, metrics: List[str]) -> List[str]:
+    """Regressions beyond threshold (a fraction) of results against baseline"""
+    previous = {record_key(record): record for record in baseline['results']}
+    regressions = []
+    for record in results['results']:
+        before = previous.get(record_key(record))
+        if before is None:
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), record.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if METRICS[metric] else change
+            if worse > threshold:
+                regressions.append(f"{record_key(record)} {metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='builtin,1000,10000',
+                        help="comma separated synthetic catalog sizes; 'builtin' runs the built-in prompts")
+    parser.add_argument('--transports', default='stdio,http')
+    parser.add_argument('--requests', type=int, default=500, help='timed requests per method')
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--baseline', help='results JSON from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='fractional change counted as a regression (default: 0.10)')
+    parser.add_argument('--metrics', default=','.join(METRICS),
+                        help='comma separated metrics to compare against the baseline')
+    options = parser.parse_args()
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'encoder': encoding.BACKEND,
+            'requests': options.requests,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in options.sizes.split(','):
+            catalog_path = None
+            if size == 'builtin':
+                prompts = PROMPTS
+            else:
+                prompts = synthetic_prompts(int(size))
+                catalog_path = os.path.join(workdir, f'catalog-{size}.json')
+                with open(catalog_path, 'w') as f:
+                    json.dump(prompts, f)
+
+            for transport in options.transports.split(','):
+                print(f"{transport} / {size} prompts ...", file=sys.stderr)
+                try:
+                    results['results'].extend(run_case(transport, size, catalog_path, prompts, options.requests))
+                except ValueError as e:
+                    sys.exit(f"Bad response from {transport} / {size} prompts, {e}")
+
+    output = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.threshold, options.metrics.split(','))
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {options.threshold:.0%} against {options.baseline}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Synthetic prompt catalogs for benchmarks
+Deterministic {category: {name: text}} tables of any size, shaped like the built-in prompts
+"""
+
+import random
+from typing import Dict
+
+WORDS = (
+    "agenda budget client deadline draft email feedback forecast goal handoff "
+    "initiative kickoff launch metric milestone onboarding owner plan priority "
+    "proposal quarter recap report review risk roadmap schedule scope sprint "
+    "stakeholder status strategy summary survey task team timeline update vendor"
+).split()
+
+VERBS = "Write Draft Summarize Rewrite Create Compare Assess Organize Outline Plan".split()
+
+PLACEHOLDERS = (
+    "[recipient]", "[topic]", "[paste text]", "[attendees]", "[timeframe]",
+    "[describe issue]", "[audience type: executives, peers, or customers]",
+)
+
+CATEGORIES = (
+    "communication-writing", "meetings-collaboration",
+    "problem-solving-decision-making", "organization-productivity",
+)
+
+
+def synthetic_prompts(count: int, seed: int = 0) -> Dict[str, Dict[str, str]]:
+    """A catalog of count prompts spread over a growing set of categories"""
+    rng = random.Random(seed)
+    category_count = max(len(CATEGORIES), count // 1000)
+    categories = [CATEGORIES[i] if i < len(CATEGORIES) else f"category-{i}"
+                  for i in range(category_count)]
+    prompts: Dict[str, Dict[str, str]] = {category: {} for category in categories}
+
+    for i in range(count):
+        category = categories[i % category_count]
+        name = f"{rng.choice(VERBS).lower()}-{rng.choice(WORDS)}-{i}"
+        sentences = []
+        for _ in range(3):
+            words = rng.sample(WORDS, 8)
+            sentences.append(f"{rng.choice(VERBS)} the {' '.join(words)} for {rng.choice(PLACEHOLDERS)}.")
+        # A rare term shared by about ten prompts, like a project code name
+        sentences.append(f"Project code{rng.randrange(max(1, count // 10))}.")
+        prompts[category][name] = ' '.join(sentences)
+
+    return prompts
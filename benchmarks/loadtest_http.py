@@ -0,0 +1,131 @@
+"""
+Load test - HTTP server routes
+Drives each route from concurrent keep-alive connections and reports requests
+per second with p50 and p99 latency. Targets a running server, or starts one
+in production mode with --spawn.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, 'http', 'openai-workplace-prompts.py')
+
+ROUTES = {
+    'initialize': ('/mcp/v1/initialize', {}),
+    'resources/list': ('/mcp/v1/resources/list', {}),
+    'resources/read': ('/mcp/v1/resources/read', {"uri": "prompt://communication-writing/write-professional-email"}),
+    'prompts/list': ('/mcp/v1/prompts/list', {}),
+    'prompts/get': ('/mcp/v1/prompts/get', {"name": "communication-writing/write-professional-email",
+                                            "arguments": {"recipient": "the team", "topic": "the launch"}}),
+    'prompts/search': ('/mcp/v1/prompts/search', {"query": "meeting notes summary"}),
+    'tools/list': ('/mcp/v1/tools/list', {}),
+    'tools/call': ('/mcp/v1/tools/call', {"name": "communication-writing/rewrite-for-clarity",
+                                          "arguments": {"input": "We should sync on the thing."}}),
+    'rpc': ('/mcp/v1', {"jsonrpc": "2.0", "id": 1, "method": "prompts/get",
+                        "params": {"name": "communication-writing/write-professional-email",
+                                   "arguments": {"recipient": "the team", "topic": "the launch"}}}),
+}
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_route(host: str, port: int, path: str, body: bytes, connections: int, duration: float):
+    latencies = [[] for _ in range(connections)]
+    errors = [0] * connections
+    deadline = time.perf_counter() + duration
+    headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+
+    def client(slot: int):
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        record = latencies[slot].append
+        while True:
+            started = time.perf_counter()
+            if started >= deadline:
+                break
+            try:
+                connection.request('POST', path, body, headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[slot] += 1
+            except (OSError, http.client.HTTPException):
+                errors[slot] += 1
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            record(time.perf_counter() - started)
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(connections)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(latency for per_client in latencies for latency in per_client)
+    return len(samples) / elapsed, percentile(samples, 0.50), percentile(samples, 0.99), sum(errors)
+
+
+def wait_for_server(host: str, port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request('POST', '/mcp/v1/initialize', b'{}', {'Content-Type': 'application/json'})
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on {host}:{port} did not come up within {timeout:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--connections', type=int, default=16, help='concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per route')
+    parser.add_argument('--routes', default=','.join(ROUTES), help='comma separated route names')
+    parser.add_argument('--spawn', action='store_true', help='start the server in production mode first')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--catalog', help='catalog for the spawned server')
+    options = parser.parse_args()
+
+    server = None
+    if options.spawn:
+        command = [sys.executable, SERVER, '--production', '--host', options.host, '--port', str(options.port),
+                   '--workers', str(options.workers), '--threads', str(options.threads)]
+        if options.catalog:
+            command += ['--catalog', options.catalog]
+        server = subprocess.Popen(command)
+    try:
+        wait_for_server(options.host, options.port)
+        print(f"{'route':>16}  {'req/s':>9}  {'p50':>9}  {'p99':>9}  {'errors':>6}")
+        for name in options.routes.split(','):
+            path, payload = ROUTES[name]
+            rps, p50, p99, errors = run_route(options.host, options.port, path, json.dumps(payload).encode('utf-8'),
+                                              options.connections, options.duration)
+            print(f"{name:>16}  {rps:>9.0f}  {p50 * 1e3:>6.2f} ms  {p99 * 1e3:>6.2f} ms  {errors:>6}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
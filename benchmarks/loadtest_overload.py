@@ -0,0 +1,134 @@
+"""
+Load test - latency past capacity
+Closed-loop clients post prompts/renderBatch requests to a production-mode
+server with one worker, at concurrency levels below and well above what its
+threads can serve. Without a queue limit every request is accepted and waits
+its turn, so p99 grows with the load; with --max-queue the excess is refused
+with 429 at once and p99 of the requests served stays near its unloaded
+value. Refused clients back off briefly before trying again.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, 'http', 'openai-workplace-prompts.py')
+
+PROMPT = 'communication-writing/write-professional-email'
+
+# Seconds a refused client waits before its next request
+BACKOFF = 0.05
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def post(port: int, body: bytes) -> int:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        connection.request('POST', '/mcp/v1/prompts/renderBatch', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_level(port: int, body: bytes, clients: int, duration: float):
+    """Served latencies, refusals and failures for clients looping for duration seconds"""
+    latencies: List[float] = []
+    counts = {'refused': 0, 'failed': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = post(port, body)
+            except OSError:
+                status = None
+            elapsed = time.perf_counter() - started
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    counts['refused' if status == 429 else 'failed'] += 1
+            if status != 200:
+                time.sleep(BACKOFF)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, counts['refused'], counts['failed']
+
+
+def start_server(server: str, port: int, threads: int, max_queue: Optional[int]) -> subprocess.Popen:
+    command = [sys.executable, server, '--production', '--host', '127.0.0.1', '--port', str(port),
+               '--workers', '1', '--threads', str(threads), '--reload-interval', '0']
+    if max_queue is not None:
+        command += ['--max-queue', str(max_queue)]
+    process = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            post(port, b'{}')
+            return process
+        except OSError:
+            if time.monotonic() > deadline:
+                process.terminate()
+                raise
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--server', default=SERVER, help='HTTP server script to run')
+    parser.add_argument('--threads', type=int, default=4, help='server threads')
+    parser.add_argument('--max-queue', type=int, default=4, help='queue limit for the bounded runs')
+    parser.add_argument('--clients', default='2,4,16,64', help='comma separated concurrency levels')
+    parser.add_argument('--rows', type=int, default=200, help='rows per request, which sets its cost')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per level')
+    options = parser.parse_args()
+
+    body = json.dumps({"name": PROMPT, "arguments": [{"recipient": f"Customer {i}", "topic": "renewal"}
+                                                     for i in range(options.rows)]}).encode('utf-8')
+    print(f"{'queue':>9}  {'clients':>7}  {'served/s':>9}  {'refused/s':>9}  {'failed':>6}"
+          f"  {'p50':>9}  {'p99':>9}")
+    for max_queue in (None, options.max_queue):
+        port = free_port()
+        process = start_server(options.server, port, options.threads, max_queue)
+        try:
+            for clients in (int(c) for c in options.clients.split(',')):
+                latencies, refused, failed = run_level(port, body, clients, options.duration)
+                label = 'unbounded' if max_queue is None else str(max_queue)
+                print(f"{label:>9}  {clients:>7}  {len(latencies) / options.duration:>9.1f}"
+                      f"  {refused / options.duration:>9.1f}  {failed:>6}"
+                      f"  {percentile(latencies, 0.5) * 1e3:>6.1f} ms  {percentile(latencies, 0.99) * 1e3:>6.1f} ms")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,231 +3,580 @@ MCP Server (HTTP) - Workplace Prompts
 Exposes workplace prompts as MCP resources and tools via HTTP
 """
 
-from flask import Flask, request, jsonify
-from typing import Dict, List, Any
+from flask import Flask, Request, Response, g, request, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import LimitedStream
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+import argparse
+import io
+import itertools
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workplace_prompts.admission import DEFAULT_MAX_INPUT_BYTES, RateLimiter, max_request_bytes, retry_after
+from workplace_prompts.cache import CachedResult, ResultCache
+from workplace_prompts.catalog import Catalog, InvalidCursor, ListIndex, ListPayload
+from workplace_prompts.compression import ENCODINGS, MIN_COMPRESS_BYTES, compress, compress_stream
+from workplace_prompts.core import OVERSIZED_ROW, RENDER_BATCH, Dispatcher, invalid_params, render_rows
+from workplace_prompts.encoding import CHUNK_BYTES, NEWLINE, Fragment, chunks, dumps, join, stream_response_parts
+from workplace_prompts.jsonrpc import INVALID_REQUEST, PARSE_ERROR, SERVER_OVERLOADED, error_response, is_notification
+from workplace_prompts.loader import CATALOG_ENV, CatalogWatcher
+from workplace_prompts.metrics import INVALID, QUEUE_FULL, RATE_LIMITED, TOO_LARGE, Metrics, request_method
+from workplace_prompts.prompts import PROMPTS
+
+
+class AdmissionRequest(Request):
+    """Request whose body is capped at MAX_REQUEST_BYTES, except NDJSON uploads to renderBatch
+
+    Werkzeug refuses an oversized Content-Length before reading any of the
+    body, and a chunked body as soon as it runs past the cap, so neither
+    is ever parsed.
+    """
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        # Batch rows are read and rendered one line at a time, each capped by ndjson_lines, so their
+        # total size is not held anywhere
+        if self.endpoint == 'render_batch' and self.mimetype == NDJSON:
+            return None
+        return MAX_REQUEST_BYTES
+
+    def get_data(self, cache: bool = True, as_text: bool = False, parse_form_data: bool = False):
+        data = super().get_data(cache, as_text, parse_form_data)
+        # Werkzeug ends a chunked body quietly at the cap, leaving it truncated rather than refused
+        if self.content_length is None and isinstance(self.stream, LimitedStream) and self.stream.is_exhausted:
+            raise RequestEntityTooLarge()
+        return data
+
 
 app = Flask(__name__)
+app.request_class = AdmissionRequest
+
+NDJSON = 'application/x-ndjson'
+EVENT_STREAM = 'text/event-stream'
+
+# Server-Sent Events framing of one JSON-RPC message on /mcp/v1
+SSE_PREFIX = b'event: message\ndata: '
+SSE_END = b'\n\n'
+
+# Bodies at least this large are sent in chunks as they are produced rather
+# than joined into one buffer, and over SSE to clients that accept it
+STREAM_BYTES = 256 * 1024
+
+# Size of the pieces those bodies are written in
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+# Request handling shared with the stdio server; its catalog is replaced
+# wholesale on reload and routes read it once per request
+SERVER = Dispatcher(Catalog(PROMPTS))
+
+
+# Admission control, set by configure_admission: per-client rate limits
+# (None for none) and the largest request body accepted
+RATE_LIMITER: Optional[RateLimiter] = None
+MAX_REQUEST_BYTES = max_request_bytes(DEFAULT_MAX_INPUT_BYTES)
+
+# Result cache budget of each process; production workers build their own cache from it
+CACHE_BYTES = 0
+
+
+def configure_admission(rate_limit: float = 0.0, burst: Optional[float] = None,
+                        max_input_bytes: int = DEFAULT_MAX_INPUT_BYTES):
+    """Limit each client to rate_limit requests a second (0 for no limit) and arguments.input to max_input_bytes"""
+    global RATE_LIMITER, MAX_REQUEST_BYTES
+    RATE_LIMITER = RateLimiter(rate_limit, burst) if rate_limit > 0 else None
+    MAX_REQUEST_BYTES = max_request_bytes(max_input_bytes)
+
+
+def configure_cache(max_bytes: int):
+    """Cache up to max_bytes of compressed prompts/get and tools/call results in each process (0 for no cache)"""
+    global CACHE_BYTES
+    CACHE_BYTES = max_bytes
+    SERVER.set_cache(ResultCache(max_bytes) if max_bytes > 0 else None)
+
+
+def init_worker(slot: int):
+    """Set up a freshly forked production worker: its metrics slot and its own result cache"""
+    SERVER.metrics.bind(slot)
+    if CACHE_BYTES > 0:
+        SERVER.set_cache(ResultCache(CACHE_BYTES))
+
+
+def set_catalog(catalog: Catalog):
+    """Swap in a fully built catalog"""
+    SERVER.set_catalog(catalog)
+
+
+def configure_catalog(path: str, reload_interval: float = 1.0, warm: bool = True):
+    """Serve prompts from path, reloading them when it changes
+
+    With warm False the catalog's derived structures are built on first use.
+    """
+    watcher = CatalogWatcher(path, set_catalog, reload_interval)
+    set_catalog(watcher.load(warm))
+    if reload_interval > 0:
+        watcher.start()
+    return watcher
+
+
+def serve_production(host: str, port: int, workers: Optional[int], threads: int, keepalive: float,
+                     catalog_path: Optional[str] = None, reload_interval: float = 1.0,
+                     max_queue: Optional[int] = None):
+    """Serve the app from preforked workers sharing one prebuilt catalog
+
+    With max_queue set, each worker holds at most that many connections
+    waiting for a thread and answers the rest with a 429 at once.
+    """
+    from workplace_prompts.prefork import serve
+
+    # Workers record into their own slot of shared memory, so /metrics
+    # reports totals for the whole server whichever worker answers it
+    workers = workers or os.cpu_count() or 1
+    SERVER.metrics = Metrics(slots=2 * workers)
+    # The master only reloads; each worker gets a cache after fork, so
+    # reloads in the master never touch a worker's cache gauges
+    SERVER.set_cache(None)
+
+    check_reload = None
+    if catalog_path:
+        # The master owns reloading; each reload forks a fresh generation of workers
+        watcher = CatalogWatcher(catalog_path, set_catalog, reload_interval)
+        # prepare warms it once, just before the workers are forked
+        set_catalog(watcher.load(warm=False))
+        if reload_interval > 0:
+            check_reload = watcher.check
+
+    serve(app, host=host, port=port, workers=workers, threads=threads, keepalive=keepalive,
+          prepare=lambda: SERVER.catalog.warm(), check_reload=check_reload,
+          reload_interval=reload_interval or 1.0, worker_init=init_worker, worker_exit=SERVER.metrics.release,
+          max_pending=max_queue, overload_body=dumps(error_response(None, SERVER_OVERLOADED, "Server overloaded")),
+          on_reject=lambda: SERVER.metrics.reject(QUEUE_FULL))
+
+
+def json_response(data: Any, status: int = 200) -> Response:
+    """JSON response encoded by the shared encoder"""
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+def rejection_response(code: int, message: str, status: int) -> Response:
+    """Refusal of a request that was never parsed: a JSON-RPC error on /mcp/v1, else an error message"""
+    if request.endpoint == 'rpc':
+        g.error_codes = (code,)
+        return json_response(error_response(None, code, message), status)
+    return json_response({"error": message}, status)
+
+
+def accepted_coding() -> Optional[str]:
+    """Best content coding this server has that the request's Accept-Encoding allows"""
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def payload_response(payload: ListPayload) -> Response:
+    """Serve a prebuilt payload, precompressed when the client accepts it, answering If-None-Match with 304"""
+    coding, body, etag = payload.encoded(accepted_coding())
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if coding is not None:
+            response.content_encoding = coding
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def list_response(index: ListIndex):
+    """Serve the list page selected by the request's cursor"""
+    data = request.get_json(silent=True)
+    # Like the routes before paging, bodies that are not objects are ignored
+    cursor = data.get('cursor') if isinstance(data, dict) else None
+    try:
+        payload = index.page(cursor)
+    except InvalidCursor:
+        return json_response({"error": "Invalid cursor"}, 400)
+    return payload_response(payload)
+
+
+# Handler errors answered with 404 on the per-method routes; others are 400
+NOT_FOUND_ERRORS = {"Resource not found", "Prompt not found", "Tool not found"}
+
+
+def result_response(result: Dict[str, Any]):
+    """Per-method route response for a handler result"""
+    error = result.get("error")
+    if error is not None:
+        status = 404 if error["message"] in NOT_FOUND_ERRORS else 400
+        return json_response({"error": error["message"]}, status)
+    return json_response(result)
 
-PROMPTS = {
-    "communication-writing": {
-        "write-professional-email": "Write a professional email to [recipient]. The email is about [topic] and should be polite, clear, and concise. Provide a subject line and a short closing.",
-        "rewrite-for-clarity": "Rewrite the following text so it is easier to understand. The text will be used in a professional setting. Ensure the tone is clear, respectful, and concise. Text: [paste text].",
-        "adapt-message-for-audience": "Reframe this message for [audience type: executives, peers, or customers]. The message was originally written for [context]. Adjust tone, word choice, and style to fit the intended audience. Text: [paste text].",
-        "draft-meeting-invite": "Draft a meeting invitation for a session about [topic]. The meeting will include [attendees/roles] and should outline agenda items, goals, and preparation required. Provide the text in calendar-invite format.",
-        "summarize-long-email": "Summarize this email thread into a short recap. The thread includes several back-and-forth messages. Highlight key decisions, action items, and open questions. Email: [paste text]."
-    },
-    "meetings-collaboration": {
-        "create-meeting-agenda": "Create a structured agenda for a meeting about [topic]. The meeting will last [time] and include [attendees]. Break the agenda into sections with time estimates and goals for each section.",
-        "summarize-meeting-notes": "Summarize these meeting notes into a structured recap. The notes are rough and informal. Organize them into categories: key decisions, next steps, and responsibilities. Notes: [paste text].",
-        "create-action-items-list": "Turn the following meeting notes into a clean task list. The tasks should be grouped by owner and include deadlines if mentioned. Notes: [paste text].",
-        "prep-questions-for-meeting": "Suggest thoughtful questions to ask in a meeting about [topic]. The purpose of the meeting is [purpose]. Provide a list of at least 5 questions that show preparation and insight.",
-        "draft-follow-up-email": "Write a professional follow-up email after a meeting about [topic]. Include a recap of key points, assigned responsibilities, and next steps with deadlines. Use a clear and polite tone."
-    },
-    "problem-solving-decision-making": {
-        "identify-root-cause": "Analyze the following workplace issue: [describe issue]. The context is that the problem has occurred multiple times. Identify possible root causes and suggest questions to confirm them.",
-        "compare-options": "Compare the following two or more possible solutions: [list options]. The decision needs to be made in [timeframe]. Evaluate pros, cons, and potential risks for each option.",
-        "decision-criteria": "Help define clear decision-making criteria for [describe decision]. The context is that multiple stakeholders are involved. Provide a short list of weighted criteria to guide the choice.",
-        "risk-assessment": "Assess the potential risks of the following plan: [describe plan]. The plan is set to start on [date]. List risks by likelihood and impact, and suggest mitigation strategies.",
-        "recommend-best-option": "Based on the following background: [describe situation and options], recommend the most suitable option. Explain your reasoning clearly and suggest first steps for implementation."
-    },
-    "organization-productivity": {
-        "document-daily-priorities": "Create a prioritized to-do list from the following tasks: [paste tasks]. The context is a typical workday with limited time. Suggest which tasks should be done first and why.",
-        "create-weekly-plan": "Build a weekly work plan for [describe role or situation]. The week includes deadlines, meetings, and individual focus time. Provide a balanced schedule with recommended priorities.",
-        "summarize-long-document": "Summarize the following document into 5 key points and 3 recommended actions. The document is [type: report, plan, or notes]. Keep the summary concise and professional. Text: [paste document].",
-        "brainstorm-solutions": "Brainstorm potential solutions to the following workplace challenge: [describe challenge]. Provide at least 5 varied ideas, noting pros and cons for each.",
-        "write-project-update": "Draft a short project update for stakeholders. The project is [describe project]. Include progress made, current blockers, and next steps. Write in a professional, concise style."
-    }
+
+def fast_result_response(method: str, params: Any) -> Optional[Response]:
+    """Per-method route response built from pre-encoded fragments, if the request allows it"""
+    if not isinstance(params, dict):
+        return None
+    stream = lazy_result(method, params)
+    if stream is not None:
+        return streamed_response(method, chunks(stream, STREAM_CHUNK_BYTES), 'application/json')
+    # Only compression makes a cache hit cheaper than rendering
+    coding = accepted_coding()
+    try:
+        if coding is None:
+            entry, result = None, SERVER.catalog.encode_result(method, params)
+        else:
+            entry, result = SERVER.cached_result(method, params)
+    except Exception:
+        return None
+    if entry is not None:
+        return cached_response(entry, coding)
+    if result is None:
+        return None
+    return fragments_response(method, result)
+
+
+def cached_response(entry: CachedResult, coding: str) -> Response:
+    """Serve a result cache entry as the compressed copy kept alongside it"""
+    response = Response(SERVER.compressed_result(entry, coding), mimetype='application/json')
+    response.content_encoding = coding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def streamed_response(method: str, body: Iterable[List[Fragment]], mimetype: str = NDJSON,
+                      codes: Iterable[int] = ()) -> Response:
+    """Send chunks of fragments as they are produced; record_request_metrics records them once the last one is sent"""
+    g.metrics_stream = (method, codes)
+    response = Response(stream_with_context(join(chunk) for chunk in body), mimetype=mimetype)
+    if mimetype == EVENT_STREAM:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def fragments_response(method: str, parts: List[Fragment]) -> Response:
+    """JSON response from encoded fragments, chunked once it reaches STREAM_BYTES"""
+    if sum(map(len, parts)) < STREAM_BYTES:
+        return Response(join(parts), mimetype='application/json')
+    return streamed_response(method, chunks(parts, STREAM_CHUNK_BYTES), 'application/json')
+
+
+def lazy_result(method: Any, params: Any) -> Optional[Iterator[Fragment]]:
+    """Result fragments encoded as they are sent, for a request whose input alone makes the result large"""
+    if (request.content_length or 0) < STREAM_BYTES or not isinstance(params, dict):
+        return None
+    return SERVER.catalog.stream_result(method, params)
+
+
+def lazy_response(message: Any) -> Optional[Iterator[Fragment]]:
+    """JSON-RPC response fragments for lazy_result, else None"""
+    if not isinstance(message, dict) or is_notification(message):
+        return None
+    result = lazy_result(message.get('method'), message.get('params', {}))
+    if result is None:
+        return None
+    return stream_response_parts(message.get('id'), result)
+
+
+def event_stream_accepted() -> bool:
+    """Whether Accept names text/event-stream itself; a wildcard is not enough"""
+    return any(value == EVENT_STREAM and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def ndjson_lines(stream) -> Iterator[Optional[bytes]]:
+    """Non-blank lines of an NDJSON body as they arrive, or None for a line over MAX_REQUEST_BYTES
+
+    No more than MAX_REQUEST_BYTES of a line is held at once; the rest of
+    a longer one is read and dropped a chunk at a time.
+    """
+    reader = io.BufferedReader(stream, CHUNK_BYTES)
+    limit = MAX_REQUEST_BYTES
+    while True:
+        line = reader.readline(limit + 1)
+        if not line:
+            return
+        if len(line) > limit:
+            while not line.endswith(b'\n'):
+                line = reader.readline(CHUNK_BYTES)
+                if not line:
+                    break
+            yield None
+        elif line.strip():
+            yield line
+
+
+def ndjson_rows(lines: Iterable[Optional[bytes]]) -> Iterator[Any]:
+    """Argument maps from ndjson_lines, parsed as they arrive; unparseable and oversized lines become row errors"""
+    for line in lines:
+        if line is None:
+            SERVER.metrics.reject(TOO_LARGE)
+            yield OVERSIZED_ROW
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+# Metrics labels for the per-method routes, by endpoint
+ROUTE_METHODS = {
+    'initialize': 'initialize',
+    'list_resources': 'resources/list',
+    'read_resource': 'resources/read',
+    'list_prompts': 'prompts/list',
+    'get_prompt': 'prompts/get',
+    'search_prompts': 'prompts/search',
+    'list_tools': 'tools/list',
+    'call_tool': 'tools/call',
+    'complete': 'completion/complete',
+    'render_batch': RENDER_BATCH,
 }
 
 
+@app.before_request
+def start_request_metrics():
+    if request.endpoint != 'metrics':
+        g.metrics_started = SERVER.metrics.enter()
+
+
+@app.before_request
+def admit_request():
+    """Turn away clients over their rate limit before their request body is read"""
+    if RATE_LIMITER is None or request.endpoint == 'metrics':
+        return None
+    wait = RATE_LIMITER.acquire(request.remote_addr or '')
+    if wait == 0.0:
+        return None
+    SERVER.metrics.reject(RATE_LIMITED)
+    response = rejection_response(SERVER_OVERLOADED, "Too many requests", 429)
+    response.headers['Retry-After'] = retry_after(wait)
+    return response
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(error: RequestEntityTooLarge) -> Response:
+    SERVER.metrics.reject(TOO_LARGE)
+    return rejection_response(INVALID_REQUEST, "Request too large", 413)
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    started = g.get('metrics_started')
+    stream = g.get('metrics_stream')
+    if started is not None and stream is not None:
+        # Recorded when the last chunk has been sent, at its size as sent: compress_response has run by now
+        method, codes = stream
+        response.response = SERVER.metrics.observe_body(method, started, request.content_length or 0,
+                                                         response.response, codes)
+    elif started is not None:
+        # /mcp/v1 labels itself by JSON-RPC method and reports JSON-RPC error codes
+        method = g.get('rpc_method') or ROUTE_METHODS.get(request.endpoint, 'other')
+        codes = g.get('error_codes')
+        if codes is None:
+            codes = (response.status_code,) if response.status_code >= 400 else ()
+        SERVER.metrics.observe(method, started, request.content_length or 0, response.content_length or 0, codes)
+    return response
+
+
+@app.after_request
+def compress_response(response: Response) -> Response:
+    """Compress large dynamic bodies at a cheap level; runs before the metrics are recorded"""
+    if response.content_encoding:
+        return response
+    if response.is_streamed:
+        # Compressed chunk by chunk, flushing each so streaming is not held up
+        response.vary.add('Accept-Encoding')
+        coding = accepted_coding()
+        if coding is not None:
+            response.response = compress_stream(response.response, coding)
+            response.content_encoding = coding
+        return response
+    if (response.content_length or 0) < MIN_COMPRESS_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    coding = accepted_coding()
+    if coding is not None:
+        response.set_data(compress(response.get_data(), coding))
+        response.content_encoding = coding
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request metrics in the Prometheus text format"""
+    return Response(SERVER.metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/mcp/v1', methods=['POST'])
+def rpc():
+    """JSON-RPC endpoint for single requests and batch arrays
+
+    Clients whose Accept names text/event-stream get streamed methods
+    and large responses as Server-Sent Events, one event per JSON-RPC
+    message, and any response as SSE if they do not accept JSON. Others
+    get JSON, or NDJSON for streamed methods. A notification, or a batch
+    of nothing else, is answered 202 with no body.
+    """
+    message = request.get_json(force=True, silent=True)
+    if message is None:
+        g.rpc_method, g.error_codes = INVALID, (PARSE_ERROR,)
+        return json_response(error_response(None, PARSE_ERROR, "Parse error"), 400)
+    g.rpc_method = request_method(message)
+    sse = event_stream_accepted()
+    stream = SERVER.stream_response(message, SSE_PREFIX, SSE_END) if sse else SERVER.stream_response(message)
+    if stream is not None:
+        return streamed_response(g.rpc_method, stream, EVENT_STREAM if sse else NDJSON)
+
+    parts = lazy_response(message)
+    if parts is not None:
+        g.error_codes, large = (), True
+    else:
+        parts, g.error_codes = SERVER.respond_encoded(message)
+        if not parts:
+            # Only notifications: accepted, with nothing to answer
+            return Response(status=202)
+        large = sum(map(len, parts)) >= STREAM_BYTES
+    if sse and (large or not request.accept_mimetypes['application/json']):
+        body = chunks(itertools.chain((SSE_PREFIX,), parts, (SSE_END,)), STREAM_CHUNK_BYTES)
+        return streamed_response(g.rpc_method, body, EVENT_STREAM, g.error_codes)
+    if large:
+        return streamed_response(g.rpc_method, chunks(parts, STREAM_CHUNK_BYTES), 'application/json', g.error_codes)
+    return Response(join(parts), mimetype='application/json')
+
+
 @app.route('/mcp/v1/initialize', methods=['POST'])
 def initialize():
     """Handle MCP initialization"""
-    return jsonify({
-        "protocolVersion": "1.0",
-        "serverInfo": {
-            "name": "workplace-prompts-server",
-            "version": "1.0.0"
-        },
-        "capabilities": {
-            "resources": {},
-            "tools": {},
-            "prompts": {}
-        }
-    })
+    return json_response(SERVER.handle_initialize({}))
 
 
 @app.route('/mcp/v1/resources/list', methods=['POST'])
 def list_resources():
     """List all available prompt resources"""
-    resources = []
-    
-    for category, prompts in PROMPTS.items():
-        for prompt_name, prompt_text in prompts.items():
-            resources.append({
-                "uri": f"prompt://{category}/{prompt_name}",
-                "name": f"{category}/{prompt_name}",
-                "description": prompt_text[:100] + "..." if len(prompt_text) > 100 else prompt_text,
-                "mimeType": "text/plain"
-            })
-    
-    return jsonify({"resources": resources})
+    return list_response(SERVER.catalog.resources_list)
 
 
 @app.route('/mcp/v1/resources/read', methods=['POST'])
 def read_resource():
     """Read a specific prompt resource"""
-    data = request.json
-    uri = data.get('uri', '')
-    
-    # Parse URI: prompt://category/prompt_name
-    if not uri.startswith('prompt://'):
-        return jsonify({"error": "Invalid URI format"}), 400
-    
-    path = uri.replace('prompt://', '').split('/')
-    if len(path) != 2:
-        return jsonify({"error": "Invalid URI path"}), 400
-    
-    category, prompt_name = path
-    
-    if category not in PROMPTS or prompt_name not in PROMPTS[category]:
-        return jsonify({"error": "Resource not found"}), 404
-    
-    return jsonify({
-        "contents": [{
-            "uri": uri,
-            "mimeType": "text/plain",
-            "text": PROMPTS[category][prompt_name]
-        }]
-    })
+    return fast_result_response('resources/read', request.json) or result_response(SERVER.handle_resources_read(request.json))
 
 
 @app.route('/mcp/v1/prompts/list', methods=['POST'])
 def list_prompts():
     """List all available prompts"""
-    prompts = []
-    
-    for category, category_prompts in PROMPTS.items():
-        for prompt_name, prompt_text in category_prompts.items():
-            # Extract arguments from prompt text
-            arguments = []
-            if '[recipient]' in prompt_text or '[topic]' in prompt_text:
-                if '[recipient]' in prompt_text:
-                    arguments.append({
-                        "name": "recipient",
-                        "description": "The recipient of the email",
-                        "required": True
-                    })
-                if '[topic]' in prompt_text:
-                    arguments.append({
-                        "name": "topic",
-                        "description": "The topic or subject matter",
-                        "required": True
-                    })
-            if '[paste text]' in prompt_text:
-                arguments.append({
-                    "name": "text",
-                    "description": "The text to process",
-                    "required": True
-                })
-            
-            prompts.append({
-                "name": f"{category}/{prompt_name}",
-                "description": prompt_text[:100] + "..." if len(prompt_text) > 100 else prompt_text,
-                "arguments": arguments
-            })
-    
-    return jsonify({"prompts": prompts})
+    return list_response(SERVER.catalog.prompts_list)
 
 
 @app.route('/mcp/v1/prompts/get', methods=['POST'])
 def get_prompt():
     """Get a specific prompt with arguments filled in"""
-    data = request.json
-    prompt_name = data.get('name', '')
-    arguments = data.get('arguments', {})
-    
-    # Parse prompt name: category/prompt_name
-    path = prompt_name.split('/')
-    if len(path) != 2:
-        return jsonify({"error": "Invalid prompt name"}), 400
-    
-    category, name = path
-    
-    if category not in PROMPTS or name not in PROMPTS[category]:
-        return jsonify({"error": "Prompt not found"}), 404
-    
-    # Get the prompt template
-    prompt_text = PROMPTS[category][name]
-    
-    # Fill in arguments
-    for key, value in arguments.items():
-        prompt_text = prompt_text.replace(f'[{key}]', str(value))
-    
-    return jsonify({
-        "messages": [{
-            "role": "user",
-            "content": {
-                "type": "text",
-                "text": prompt_text
-            }
-        }]
-    })
+    return fast_result_response('prompts/get', request.json) or result_response(SERVER.handle_prompts_get(request.json))
+
+
+@app.route('/mcp/v1/prompts/renderBatch', methods=['POST'])
+def render_batch():
+    """Render one prompt for many argument maps, streaming back one NDJSON line per row
+
+    Takes {"name": ..., "arguments": [...]} as JSON, or as NDJSON a
+    {"name": ...} line followed by one argument map per line, which are
+    read only as fast as rows are rendered. A line over the request size
+    limit is refused with 413 when it names the prompt, and becomes a row
+    error otherwise. The last line is {"done": true} with the row count,
+    errors and rows per second.
+    """
+    if request.mimetype == NDJSON:
+        lines = ndjson_lines(request.stream)
+        first = next(lines, b'null')
+        if first is None:
+            raise RequestEntityTooLarge()
+        try:
+            params = json.loads(first)
+        except ValueError:
+            params = None
+        rows = ndjson_rows(lines)
+    else:
+        params = request.json
+        rows = params.get('arguments') if isinstance(params, dict) else None
+    if not isinstance(params, dict):
+        return json_response({"error": "Expected a JSON object naming the prompt"}, 400)
+
+    record, error = SERVER.render_batch_source(params)
+    if error is not None:
+        return result_response(error)
+    if not isinstance(rows, list) and request.mimetype != NDJSON:
+        return result_response(invalid_params("arguments must be a list of argument maps"))
+    return streamed_response(RENDER_BATCH, render_rows(
+        record, rows, b'', NEWLINE, lambda summary: [dumps({"done": True, **summary}), NEWLINE]))
+
+
+@app.route('/mcp/v1/prompts/search', methods=['POST'])
+def search_prompts():
+    """Search prompts by name, category and text"""
+    return result_response(SERVER.handle_prompts_search(request.json))
 
 
 @app.route('/mcp/v1/tools/list', methods=['POST'])
 def list_tools():
     """List all available tools"""
-    tools = []
-    
-    for category, category_prompts in PROMPTS.items():
-        for prompt_name in category_prompts.keys():
-            tools.append({
-                "name": f"{category}/{prompt_name}",
-                "description": f"Generate workplace content using the {prompt_name} prompt",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "input": {
-                            "type": "string",
-                            "description": "The input text or parameters for the prompt"
-                        }
-                    },
-                    "required": ["input"]
-                }
-            })
-    
-    return jsonify({"tools": tools})
+    return list_response(SERVER.catalog.tools_list)
 
 
 @app.route('/mcp/v1/tools/call', methods=['POST'])
 def call_tool():
     """Execute a tool (return the prompt with input)"""
-    data = request.json
-    tool_name = data.get('name', '')
-    arguments = data.get('arguments', {})
-    
-    # Parse tool name: category/prompt_name
-    path = tool_name.split('/')
-    if len(path) != 2:
-        return jsonify({"error": "Invalid tool name"}), 400
-    
-    category, name = path
-    
-    if category not in PROMPTS or name not in PROMPTS[category]:
-        return jsonify({"error": "Tool not found"}), 404
-    
-    prompt_text = PROMPTS[category][name]
-    user_input = arguments.get('input', '')
-    
-    return jsonify({
-        "content": [{
-            "type": "text",
-            "text": f"{prompt_text}\n\nInput: {user_input}"
-        }]
-    })
+    return fast_result_response('tools/call', request.json) or result_response(SERVER.handle_tools_call(request.json))
+
+
+@app.route('/mcp/v1/completion/complete', methods=['POST'])
+def complete():
+    """Complete a prompt name, category or resource URI"""
+    return result_response(SERVER.handle_completion_complete(request.json))
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=3000, debug=True)
+    parser = argparse.ArgumentParser(description="Workplace prompts MCP server (HTTP)")
+    parser.add_argument('--catalog', default=os.environ.get(CATALOG_ENV),
+                        help="JSON file, directory, snapshot or SQLite store to load prompts from "
+                             f"(default: ${CATALOG_ENV}, else the built-in prompts)")
+    parser.add_argument('--warmup', action='store_true',
+                        help="build list pages, search index and compressed pages before serving; "
+                             "always done in production mode (default: build each on first use)")
+    parser.add_argument('--reload-interval', type=float, default=1.0,
+                        help="seconds between checks for catalog changes; 0 disables reloading")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--production', action='store_true',
+                        help="serve from preforked worker processes instead of the development server")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes in production mode (default: CPU count)")
+    parser.add_argument('--threads', type=int, default=8,
+                        help="threads per worker in production mode")
+    parser.add_argument('--keepalive', type=float, default=5.0,
+                        help="seconds an idle keep-alive connection is held open in production mode")
+    parser.add_argument('--max-queue', type=int, default=None,
+                        help="in production mode, connections each worker holds waiting for a thread "
+                             "before answering more with 429 (default: no limit)")
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help="requests a second allowed per client address, per worker; 0 disables the limit")
+    parser.add_argument('--burst', type=float, default=None,
+                        help="requests a client may make at once before --rate-limit applies (default: the rate)")
+    parser.add_argument('--max-input-bytes', type=int, default=DEFAULT_MAX_INPUT_BYTES,
+                        help="largest arguments.input accepted; larger request bodies get 413 unread")
+    parser.add_argument('--cache-bytes', type=int, default=0,
+                        help="bytes of prompts/get and tools/call results to keep compressed for clients "
+                             "that accept compression, per worker; 0 disables the cache")
+    args = parser.parse_args()
+
+    configure_admission(args.rate_limit, args.burst, args.max_input_bytes)
+    configure_cache(args.cache_bytes)
+
+    if args.production:
+        serve_production(args.host, args.port, args.workers, args.threads, args.keepalive,
+                         args.catalog, args.reload_interval, args.max_queue)
+    else:
+        if args.catalog:
+            configure_catalog(args.catalog, args.reload_interval, warm=False)
+        if args.warmup:
+            SERVER.catalog.warm()
+        app.run(host=args.host, port=args.port, debug=True)
@@ -0,0 +1,22 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def http_app():
+    """The HTTP server module, loaded from its script"""
+    spec = importlib.util.spec_from_file_location('http_server', os.path.join(ROOT, 'http', 'openai-workplace-prompts.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def client(http_app):
+    return http_app.app.test_client()
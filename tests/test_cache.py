@@ -0,0 +1,47 @@
+from workplace_prompts.cache import ResultCache
+from workplace_prompts.catalog import Catalog
+from workplace_prompts.core import Dispatcher
+from workplace_prompts.prompts import PROMPTS
+
+NAME = "meetings-collaboration/summarize-meeting-notes"
+PARAMS = {"name": NAME, "arguments": {"paste text": "notes " * 400}}
+
+
+def edited(prompts):
+    """A copy of prompts in which NAME's text has changed"""
+    category, name = NAME.split('/')
+    return {**prompts, category: {**prompts[category], name: "Revised: [paste text]"}}
+
+
+def test_repeated_request_is_a_hit():
+    server = Dispatcher(cache=ResultCache(1 << 20))
+    entry, fragments = server.cached_result('prompts/get', PARAMS)
+    assert entry is not None and fragments is None
+    assert server.cached_result('prompts/get', PARAMS)[0] is entry
+    assert server.metrics.snapshot()['cache']['hits'] == 1
+
+
+def test_small_results_bypass_the_cache():
+    server = Dispatcher(cache=ResultCache(1 << 20))
+    entry, fragments = server.cached_result('prompts/get', {"name": NAME, "arguments": {"paste text": "hi"}})
+    assert entry is None and fragments is not None
+    assert not server.cache.entries
+
+
+def test_set_catalog_empties_the_cache():
+    server = Dispatcher(cache=ResultCache(1 << 20))
+    old_catalog = server.catalog
+    entry, _ = server.cached_result('prompts/get', PARAMS)
+
+    server.set_catalog(Catalog(edited(PROMPTS)))
+    assert not server.cache.entries and server.cache.size == 0
+    stats = server.metrics.snapshot()['cache']
+    assert stats['invalidations'] == 1 and stats['entries'] == 0
+
+    fresh, _ = server.cached_result('prompts/get', PARAMS)
+    assert fresh is not entry
+    assert b'Revised: ' in fresh.body and b'Revised: ' not in entry.body
+    # A request that began against the replaced catalog cannot store its result
+    assert server.cache.put(old_catalog, entry) == 0
+    assert server.cache.get(old_catalog, entry.key) is None
+    assert server.cache.get(server.catalog, entry.key) is fresh
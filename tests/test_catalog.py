@@ -0,0 +1,108 @@
+import pytest
+
+from workplace_prompts.catalog import Catalog, InvalidCursor, encode_cursor, prompt_entry
+from workplace_prompts.core import Dispatcher
+from workplace_prompts.snapshot import SnapshotCatalog, write_snapshot
+from workplace_prompts.store import SQLiteCatalog, write_store
+from workplace_prompts.encoding import dumps, join, string_body
+from workplace_prompts.prompts import PROMPTS
+from workplace_prompts.templates import CompiledTemplate
+
+PAGED = {f"category-{c}": {f"prompt-{n}": f"Write about [topic] for prompt {c}/{n}" for n in range(40)}
+         for c in range(6)}
+
+
+def edited_prompts():
+    """PAGED with one prompt's text changed"""
+    return {**PAGED, "category-0": {**PAGED["category-0"], "prompt-0": "Changed [topic]"}}
+
+
+def replace_loop(text, arguments):
+    """How prompts/get filled placeholders before templates were compiled"""
+    for key, value in arguments.items():
+        text = text.replace(f'[{key}]', str(value))
+    return text
+
+
+def walk(index):
+    """Every entry of a list, page by page through nextCursor"""
+    entries = []
+    cursor = None
+    while True:
+        result = index.page(cursor).result
+        entries += result[index.key]
+        cursor = result.get('nextCursor')
+        if cursor is None:
+            return entries
+
+
+@pytest.mark.parametrize('page_size', [1, 7, 100, 240, 1000])
+def test_cursor_paging_visits_every_entry_once(page_size):
+    catalog = Catalog(PAGED, page_size=page_size)
+    expected = [prompt_entry(*metadata) for metadata in catalog.metadata()]
+    assert walk(catalog.prompts_list) == expected
+
+
+def test_pages_are_their_encoded_bodies():
+    index = Catalog(PAGED, page_size=50).tools_list
+    payload = index.page(index.first_page.result['nextCursor'])
+    assert join([dumps(payload.result)]) == payload.body
+
+
+@pytest.mark.parametrize('cursor', ['', 'not a cursor', 'MA', '!!!!'])
+def test_foreign_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        Catalog(PAGED, page_size=50).prompts_list.page(cursor)
+
+
+def test_cursor_past_the_end_is_rejected():
+    index = Catalog(PAGED, page_size=50).prompts_list
+    with pytest.raises(InvalidCursor):
+        index.page(encode_cursor(index.tag, len(index.entries)))
+
+
+def test_cursors_from_before_a_reload_are_rejected():
+    cursor = Catalog(PAGED, page_size=50).prompts_list.first_page.result['nextCursor']
+    reloaded = Catalog({"added": {"prompt": "New [topic]"}, **PAGED}, page_size=50)
+    with pytest.raises(InvalidCursor):
+        reloaded.prompts_list.page(cursor)
+    # An unchanged catalog still takes it
+    assert Catalog(PAGED, page_size=50).prompts_list.page(cursor).result['prompts']
+
+
+def test_stale_cursor_is_invalid_params():
+    server = Dispatcher(Catalog(PAGED, page_size=50))
+    cursor = server.handle_prompts_list({})['nextCursor']
+    server.set_catalog(Catalog(edited_prompts(), page_size=50))
+    assert server.handle_prompts_list({"cursor": cursor}) == {"error": {"code": -32602, "message": "Invalid cursor"}}
+
+
+def test_snapshot_and_store_lists_issue_the_same_cursors(tmp_path):
+    catalog = Catalog(PAGED, page_size=50)
+    write_snapshot(str(tmp_path / 'catalog.snapshot'), catalog)
+    write_store(str(tmp_path / 'catalog.sqlite'), PAGED)
+    for other in (SnapshotCatalog(str(tmp_path / 'catalog.snapshot')),
+                  SQLiteCatalog(str(tmp_path / 'catalog.sqlite'), page_size=50)):
+        for key in ('resources_list', 'prompts_list', 'tools_list'):
+            index, restored = getattr(catalog, key), getattr(other, key)
+            assert restored.tag == index.tag
+            cursor = index.first_page.result['nextCursor']
+            assert restored.page(cursor).body == index.page(cursor).body
+
+
+@pytest.mark.parametrize('category,name', [(category, name) for category, prompts in PROMPTS.items()
+                                           for name in prompts])
+def test_compiled_render_matches_the_replace_loop(category, name):
+    text = PROMPTS[category][name]
+    template = CompiledTemplate(text)
+    argument_sets = [
+        {},
+        {"topic": "the launch"},
+        {"recipient": "the team", "topic": "Q3 plans", "paste text": "notes\nwith \"quotes\""},
+        {slot: f"value {i}" for i, slot in enumerate(template.slots)},
+        {"unused": "ignored", **{slot: 42 for slot in template.slots}},
+    ]
+    for arguments in argument_sets:
+        expected = replace_loop(text, arguments)
+        assert template.render(arguments) == expected
+        assert join(template.render_encoded(arguments)) == string_body(expected)
@@ -0,0 +1,138 @@
+import gzip
+import json
+
+import pytest
+
+LIST_ROUTES = ['/mcp/v1/prompts/list', '/mcp/v1/resources/list', '/mcp/v1/tools/list']
+
+
+@pytest.mark.parametrize('route', LIST_ROUTES)
+def test_matching_etag_gets_304_without_a_body(client, route):
+    first = client.post(route, json={})
+    assert first.status_code == 200 and first.headers['ETag']
+    cached = client.post(route, json={}, headers={'If-None-Match': first.headers['ETag']})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == first.headers['ETag']
+
+
+@pytest.mark.parametrize('route', LIST_ROUTES)
+def test_stale_etag_gets_the_page(client, route):
+    response = client.post(route, json={}, headers={'If-None-Match': '"0123456789abcdef"'})
+    assert response.status_code == 200
+    assert json.loads(response.data)
+
+
+def test_each_coding_has_its_own_etag(client):
+    plain = client.post('/mcp/v1/prompts/list', json={})
+    gzipped = client.post('/mcp/v1/prompts/list', json={}, headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == plain.data
+    assert gzipped.headers['ETag'] != plain.headers['ETag']
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+    # The uncompressed copy's tag does not validate the gzipped one
+    response = client.post('/mcp/v1/prompts/list', json={},
+                           headers={'Accept-Encoding': 'gzip', 'If-None-Match': plain.headers['ETag']})
+    assert response.status_code == 200
+    response = client.post('/mcp/v1/prompts/list', json={},
+                           headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzipped.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_list_routes_page_by_cursor(client):
+    names = []
+    body = {}
+    while True:
+        result = json.loads(client.post('/mcp/v1/prompts/list', json=body).data)
+        names += [prompt['name'] for prompt in result['prompts']]
+        if 'nextCursor' not in result:
+            break
+        body = {"cursor": result['nextCursor']}
+    assert len(names) == len(set(names)) > 0
+
+
+def test_invalid_cursor_is_a_400(client):
+    assert client.post('/mcp/v1/prompts/list', json={"cursor": "bogus"}).status_code == 400
+
+
+NAME_LINE = json.dumps({"name": "meetings-collaboration/summarize-meeting-notes"}).encode() + b'\n'
+
+
+@pytest.fixture
+def small_requests(http_app):
+    """Requests capped at the envelope alone, 64 KiB"""
+    http_app.configure_admission(max_input_bytes=0)
+    yield http_app.MAX_REQUEST_BYTES
+    http_app.configure_admission()
+
+
+def render_batch(client, body):
+    response = client.post('/mcp/v1/prompts/renderBatch', data=body, content_type='application/x-ndjson')
+    return response, [json.loads(line) for line in response.data.splitlines()]
+
+
+def test_oversized_ndjson_row_becomes_a_row_error(client, http_app, small_requests):
+    rejected = http_app.SERVER.metrics.snapshot()['rejected']['too_large']
+    row = json.dumps({"paste text": "x" * small_requests}).encode() + b'\n'
+    response, lines = render_batch(client, NAME_LINE + b'{"paste text": "a"}\n' + row + b'{"paste text": "b"}\n')
+    assert response.status_code == 200
+    assert [line.get('error') for line in lines[:3]] == [None, "Row too large", None]
+    assert [line['index'] for line in lines[:3]] == [0, 1, 2]
+    assert lines[3]['done'] and lines[3]['rows'] == 3 and lines[3]['errors'] == 1
+    assert http_app.SERVER.metrics.snapshot()['rejected']['too_large'] == rejected + 1
+
+
+def test_oversized_ndjson_name_line_is_a_413(client, http_app, small_requests):
+    rejected = http_app.SERVER.metrics.snapshot()['rejected']['too_large']
+    line = json.dumps({"name": "x" * small_requests}).encode() + b'\n'
+    response, _ = render_batch(client, line + b'{}\n')
+    assert response.status_code == 413
+    assert http_app.SERVER.metrics.snapshot()['rejected']['too_large'] == rejected + 1
+
+
+@pytest.mark.parametrize('body', ['[1]', '"x"', '3', 'null'])
+def test_list_routes_ignore_bodies_that_are_not_objects(client, body):
+    response = client.post('/mcp/v1/prompts/list', data=body, content_type='application/json')
+    assert response.status_code == 200
+    assert 'prompts' in json.loads(response.data)
+
+
+@pytest.mark.parametrize('route', ['/mcp/v1/prompts/search', '/mcp/v1/completion/complete'])
+@pytest.mark.parametrize('body', ['[1]', '"x"', '3', 'null'])
+def test_routes_taking_params_refuse_bodies_that_are_not_objects(client, route, body):
+    response = client.post(route, data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert json.loads(response.data) == {"error": "params must be an object"}
+
+
+def test_cursor_from_before_a_reload_is_a_400(client, http_app):
+    from workplace_prompts.catalog import Catalog
+    from workplace_prompts.prompts import PROMPTS
+
+    original = http_app.SERVER.catalog
+    http_app.SERVER.set_catalog(Catalog(PROMPTS, page_size=5))
+    try:
+        cursor = json.loads(client.post('/mcp/v1/prompts/list', json={}).data)['nextCursor']
+        assert client.post('/mcp/v1/prompts/list', json={"cursor": cursor}).status_code == 200
+        http_app.SERVER.set_catalog(Catalog({"extra": {"prompt": "Extra"}, **PROMPTS}, page_size=5))
+        response = client.post('/mcp/v1/prompts/list', json={"cursor": cursor})
+        assert response.status_code == 400
+        assert json.loads(response.data) == {"error": "Invalid cursor"}
+    finally:
+        http_app.SERVER.set_catalog(original)
+
+
+@pytest.mark.parametrize('encoding', [None, 'gzip'])
+def test_streamed_responses_are_recorded_at_their_size_as_sent(client, http_app, encoding):
+    def sent():
+        method = http_app.SERVER.metrics.snapshot()['methods'].get('prompts/renderBatch')
+        return method['responseBytes']['sum'] if method else 0
+
+    before = sent()
+    rows = b''.join(json.dumps({"paste text": f"row {i} " * 20}).encode() + b'\n' for i in range(2000))
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    response = client.post('/mcp/v1/prompts/renderBatch', data=NAME_LINE + rows,
+                           content_type='application/x-ndjson', headers=headers)
+    assert response.headers.get('Content-Encoding') == encoding
+    body = response.data
+    assert sent() - before == len(body)
@@ -0,0 +1,43 @@
+import json
+
+from workplace_prompts.core import Dispatcher
+from workplace_prompts.jsonrpc import INVALID_REQUEST, METHOD_NOT_FOUND
+
+
+def respond(server, message):
+    parts, _ = server.respond_encoded(message)
+    return json.loads(b''.join(parts)) if parts else None
+
+
+def test_batch_answers_every_request_in_order():
+    server = Dispatcher()
+    responses = respond(server, [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize"},
+        {"jsonrpc": "2.0", "id": 2, "method": "no/such"},
+        {"jsonrpc": "2.0", "id": 3, "method": "prompts/list"},
+    ])
+    assert [response['id'] for response in responses] == [1, 2, 3]
+    assert 'protocolVersion' in responses[0]['result']
+    assert responses[1]['error']['code'] == METHOD_NOT_FOUND
+    assert 'prompts' in responses[2]['result']
+
+
+def test_batch_members_that_are_not_objects_get_their_own_errors():
+    responses = respond(Dispatcher(), [1, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}])
+    assert responses[0] == {"jsonrpc": "2.0", "id": None,
+                            "error": {"code": INVALID_REQUEST, "message": "Invalid Request"}}
+    assert 'tools' in responses[1]['result']
+
+
+def test_empty_batch_is_an_invalid_request():
+    assert respond(Dispatcher(), [])['error']['code'] == INVALID_REQUEST
+
+
+def test_notifications_are_not_answered():
+    server = Dispatcher()
+    assert respond(server, {"jsonrpc": "2.0", "method": "prompts/list"}) is None
+    assert respond(server, [{"jsonrpc": "2.0", "method": "notifications/initialized"},
+                            {"jsonrpc": "2.0", "method": "prompts/list"}]) is None
+    responses = respond(server, [{"jsonrpc": "2.0", "method": "prompts/list"},
+                                 {"jsonrpc": "2.0", "id": 5, "method": "tools/list"}])
+    assert [response['id'] for response in responses] == [5]
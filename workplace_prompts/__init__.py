@@ -0,0 +1,4 @@
+"""
+Workplace Prompts - shared server internals
+Code used by both the stdio and HTTP MCP servers
+"""
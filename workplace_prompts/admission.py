@@ -0,0 +1,66 @@
+"""
+Admission control
+Per-client token-bucket rate limits and the request size allowance, checked
+before a request body is read or parsed. The bounded work queues themselves
+live with each transport's loop: async_stdio and the preforking HTTP server.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Largest arguments.input accepted by default
+DEFAULT_MAX_INPUT_BYTES = 64 * 1024 * 1024
+
+# Allowance for everything in a request besides arguments.input: the
+# JSON-RPC envelope, the prompt name and the other arguments
+ENVELOPE_BYTES = 64 * 1024
+
+# Clients whose buckets are tracked at once; the least recently seen are dropped
+MAX_CLIENTS = 10000
+
+
+def max_request_bytes(max_input_bytes: int) -> int:
+    """Longest request body or line that can carry an arguments.input of max_input_bytes"""
+    return max_input_bytes + ENVELOPE_BYTES
+
+
+class RateLimiter:
+    """A token bucket per client, refilled at rate tokens a second up to burst
+
+    Each request takes one token. Buckets are updated lazily when their
+    client next shows up, so idle clients cost nothing but their entry.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_clients: int = MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.max_clients = max_clients
+        # client -> (tokens, monotonic time of the last update), least recently seen first
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, client: str) -> float:
+        """Take a token for client: 0.0 if it had one, else seconds until it will"""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.pop(client, None)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / self.rate
+            self.buckets[client] = (tokens, now)
+            if len(self.buckets) > self.max_clients:
+                del self.buckets[next(iter(self.buckets))]
+            return wait
+
+
+def retry_after(wait: float) -> str:
+    """Retry-After header value for a wait in seconds"""
+    return str(max(1, math.ceil(wait)))
@@ -0,0 +1,222 @@
+"""
+Concurrent stdio transport
+Reads newline-delimited requests continuously, handles up to max_in_flight
+at once and writes each response as soon as it is ready, coalescing writes
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional
+
+from .encoding import Fragment, Response, write_parts
+
+# Longest request line accepted by default; longer lines get too_large_response
+MAX_LINE_BYTES = 64 * 1024 * 1024
+
+# Requests at least this long run on a worker thread so they cannot hold up
+# the small ones; shorter requests are handled inline on the event loop
+OFFLOAD_BYTES = 64 * 1024
+
+# Pending output is flushed once it reaches this size
+FLUSH_BYTES = 64 * 1024
+
+# Inline requests handled back to back before yielding to offloaded work and the writer
+YIELD_EVERY = 32
+
+
+async def _open_stdin(limit: int) -> asyncio.StreamReader:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer)
+    except ValueError:
+        # Regular files cannot be registered with the event loop; feed from a thread
+        def feed():
+            read = sys.stdin.buffer.read1 if hasattr(sys.stdin.buffer, 'read1') else sys.stdin.buffer.read
+            while True:
+                chunk = read(FLUSH_BYTES)
+                if not chunk:
+                    loop.call_soon_threadsafe(reader.feed_eof)
+                    return
+                loop.call_soon_threadsafe(reader.feed_data, chunk)
+
+        threading.Thread(target=feed, name='stdin-reader', daemon=True).start()
+    return reader
+
+
+async def _read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Next line, b'' at EOF, or None for a line over the reader's limit
+
+    The whole of a long line is skipped, not just the part that was buffered
+    when it overran, so its tail is never read as a request of its own.
+    """
+    try:
+        return await reader.readuntil(b'\n')
+    except asyncio.IncompleteReadError as error:
+        return error.partial
+    except asyncio.LimitOverrunError as error:
+        consumed = error.consumed
+    while True:
+        try:
+            await reader.readexactly(consumed)
+            await reader.readuntil(b'\n')
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as error:
+            consumed = error.consumed
+
+
+class _Writer:
+    """Collects encoded responses and writes them in as few syscalls as possible"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.pending: List[Fragment] = []
+        self.size = 0
+        self.scheduled = False
+
+    def write(self, parts: List[Fragment]):
+        self.pending.extend(parts)
+        self.size += sum(len(part) for part in parts)
+        if self.size >= FLUSH_BYTES:
+            self.flush()
+        elif not self.scheduled:
+            self.scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        self.scheduled = False
+        if self.pending:
+            parts = self.pending
+            self.pending = []
+            self.size = 0
+            write_parts(self.stream, parts)
+
+
+async def serve(respond: Callable[[bytes], Response],
+                too_large_response: Callable[[], List[Fragment]],
+                max_in_flight: int = 64,
+                stream=None,
+                max_queue: Optional[int] = None,
+                overloaded_response: Optional[Callable[[bytes], List[Fragment]]] = None,
+                max_line_bytes: int = MAX_LINE_BYTES):
+    """Serve stdin until EOF
+
+    respond turns one request line into the fragments of one encoded
+    response line; it may be called from worker threads. At most max_in_flight requests are handled at
+    once. Beyond that, with max_queue None, reading stops and the pipe
+    applies backpressure. Otherwise up to max_queue requests wait for a
+    slot and any more are answered at once with overloaded_response(line).
+    A streamed response is pulled a chunk at a time on a worker thread and
+    written as each chunk arrives, so it is never held in memory whole.
+    """
+    loop = asyncio.get_running_loop()
+    reader = await _open_stdin(max_line_bytes)
+    writer = _Writer(stream or sys.stdout.buffer)
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    executor = ThreadPoolExecutor(max_workers=min(max_in_flight, (os.cpu_count() or 1) + 4),
+                                  thread_name_prefix='mcp-request')
+
+    def spawn(coroutine):
+        task = loop.create_task(coroutine)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def drain(chunks: Iterator[List[Fragment]]):
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, None)
+            if chunk is None:
+                return
+            writer.write(chunk)
+
+    async def offload(line: bytes):
+        try:
+            response = await loop.run_in_executor(executor, respond, line)
+            if isinstance(response, list):
+                writer.write(response)
+            else:
+                await drain(response)
+        finally:
+            slots.release()
+
+    async def stream_out(chunks: Iterator[List[Fragment]]):
+        try:
+            await drain(chunks)
+        finally:
+            slots.release()
+
+    def dispatch(line: bytes) -> bool:
+        """Handle line with a slot held; True when it was answered inline"""
+        if len(line) >= OFFLOAD_BYTES:
+            spawn(offload(line))
+            return False
+        response = None
+        try:
+            response = respond(line)
+            if isinstance(response, list):
+                writer.write(response)
+        finally:
+            # A streamed response keeps its slot until it is drained
+            if response is None or isinstance(response, list):
+                slots.release()
+        if isinstance(response, list):
+            return True
+        # Streamed responses do their work as they are pulled; keep that
+        # off the event loop like the long requests
+        spawn(stream_out(response))
+        return False
+
+    waiting = 0
+
+    async def queued(line: bytes):
+        nonlocal waiting
+        try:
+            await slots.acquire()
+        finally:
+            waiting -= 1
+        dispatch(line)
+
+    handled = 0
+    try:
+        while True:
+            line = await _read_line(reader)
+            if line is None:
+                writer.write(too_large_response())
+                continue
+            if not line:
+                break
+            if not line.strip():
+                continue
+            if max_queue is not None and slots.locked():
+                if waiting >= max_queue:
+                    writer.write(overloaded_response(line))
+                    continue
+                waiting += 1
+                spawn(queued(line))
+                continue
+            await slots.acquire()
+            if dispatch(line):
+                handled += 1
+                if handled % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+
+        # Queued requests start more tasks as they get their slots
+        while tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        writer.flush()
+        executor.shutdown(wait=False)
+
+
+def run(respond: Callable[[bytes], Response], too_large_response: Callable[[], List[Fragment]],
+        max_in_flight: int = 64, stream: Optional[object] = None, max_queue: Optional[int] = None,
+        overloaded_response: Optional[Callable[[bytes], List[Fragment]]] = None,
+        max_line_bytes: int = MAX_LINE_BYTES):
+    """Blocking entry point for serve"""
+    asyncio.run(serve(respond, too_large_response, max_in_flight, stream, max_queue,
+                      overloaded_response, max_line_bytes))
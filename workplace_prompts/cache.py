@@ -0,0 +1,141 @@
+"""
+Result cache
+A bounded LRU of encoded prompts/get and tools/call results and their
+compressed copies, so an HTTP request repeated with the same prompt and
+arguments skips rendering and, above all, compression. Entries are keyed
+by method, prompt name and the sorted argument pairs, which the dict
+hashes, and are charged by size, compressed copies included, against a
+byte budget. The cache belongs to one catalog at a time and is emptied
+when it is replaced.
+"""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .compression import compress
+
+# Methods whose results are cached
+CACHED_METHODS = frozenset(('prompts/get', 'tools/call'))
+
+# Bookkeeping charged per entry on top of its key and result bytes
+ENTRY_OVERHEAD = 200
+
+# (method, prompt name, argument pairs sorted by name, total length of the name and arguments)
+Key = Tuple[str, str, Tuple[Tuple[str, str], ...], int]
+
+
+def cache_key(method: str, params: Dict[str, Any], min_bytes: int, max_bytes: int) -> Optional[Key]:
+    """Key for a cacheable request, or None when it should bypass the cache
+
+    Only string arguments, as MCP prompt arguments are, make a key: 1,
+    1.0 and true are equal as dict keys but render differently. Requests
+    whose name and arguments are shorter than min_bytes or longer than
+    max_bytes in total are not worth keying.
+    """
+    name = params.get('name')
+    arguments = params.get('arguments', {})
+    if not isinstance(name, str) or not isinstance(arguments, dict):
+        return None
+    length = len(name)
+    for argument, value in arguments.items():
+        if type(value) is not str or type(argument) is not str:
+            return None
+        length += len(argument) + len(value)
+    if not min_bytes <= length <= max_bytes:
+        return None
+    return method, name, tuple(sorted(arguments.items())), length
+
+
+class CachedResult:
+    """An encoded result and its compressed copies, made once per content coding"""
+
+    __slots__ = ('key', 'body', 'compressed')
+
+    def __init__(self, key: Key, body: bytes):
+        self.key = key
+        self.body = body
+        self.compressed: Dict[str, bytes] = {}
+
+    @property
+    def charge(self) -> int:
+        """Bytes this entry counts for against the cache's budget"""
+        return self.key[3] + len(self.body) + sum(map(len, self.compressed.values())) + ENTRY_OVERHEAD
+
+
+class ResultCache:
+    """CachedResults by Key, least recently used first, up to max_bytes in total
+
+    Lookups and inserts name the catalog they were made against and only
+    count while it is the cache's current catalog, so a request that
+    started before a reload can neither read nor store results of the
+    catalog that replaced its own.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        # One result may take at most this much, so a few large ones cannot flush the rest
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 8
+        self.entries: Dict[Key, CachedResult] = {}
+        self.size = 0
+        self.catalog: Any = None
+        self.lock = threading.Lock()
+
+    def get(self, catalog: Any, key: Key) -> Optional[CachedResult]:
+        """The cached result for key, marked as most recently used"""
+        with self.lock:
+            if catalog is not self.catalog:
+                return None
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.entries[key] = entry
+            return entry
+
+    def _evict(self) -> int:
+        evicted = 0
+        while self.size > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self.size -= self.entries.pop(oldest).charge
+            evicted += 1
+        return evicted
+
+    def put(self, catalog: Any, entry: CachedResult) -> int:
+        """Keep entry unless it is too large, returning how many entries were evicted to make room"""
+        charge = entry.charge
+        if charge > self.max_entry_bytes:
+            return 0
+        with self.lock:
+            if catalog is not self.catalog:
+                return 0
+            previous = self.entries.pop(entry.key, None)
+            if previous is not None:
+                self.size -= previous.charge
+            self.entries[entry.key] = entry
+            self.size += charge
+            return self._evict()
+
+    def encoded(self, entry: CachedResult, coding: str) -> Tuple[bytes, int]:
+        """entry's body in the given content coding, and how many entries were evicted to keep it
+
+        The copy is made at the dynamic level, so the first request for it
+        costs what an uncached one would. It is only kept, and charged,
+        while entry is still in the cache.
+        """
+        body = entry.compressed.get(coding)
+        if body is not None:
+            return body, 0
+        body = compress(entry.body, coding)
+        with self.lock:
+            if self.entries.get(entry.key) is not entry or coding in entry.compressed:
+                return body, 0
+            entry.compressed[coding] = body
+            self.size += len(body)
+            return body, self._evict()
+
+    def reset(self, catalog: Any) -> int:
+        """Drop every entry and serve catalog from now on; returns the entries dropped"""
+        with self.lock:
+            dropped = len(self.entries)
+            self.entries = {}
+            self.size = 0
+            self.catalog = catalog
+        return dropped
@@ -0,0 +1,493 @@
+"""
+Prompt catalog
+Holds a {category: {name: text}} prompt table together with everything derived
+from it: a flat "category/name" index of compiled prompts and the prebuilt
+list responses
+"""
+
+import base64
+import binascii
+import itertools
+import json
+from array import array
+from collections.abc import Sequence
+from functools import cached_property, lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+
+from .completion import CompletionIndex
+from .compression import ENCODINGS, MIN_COMPRESS_BYTES, compress
+from .encoding import Fragment, dumps, kept, kept_string_body, response_parts, string_body, string_body_pieces
+from .jsonrpc import is_notification
+from .search import SearchIndex
+from .templates import CompiledTemplate
+
+# Entries per list page; None disables pagination
+DEFAULT_PAGE_SIZE = 100
+
+# Pages after the first kept per list, with their compressed copies
+PAGE_CACHE_SIZE = 256
+
+# prompts/search result limits
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 100
+
+
+# Scheme of the resource URIs, prompt://category/name
+URI_PREFIX = 'prompt://'
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor this catalog did not issue"""
+
+
+def describe(prompt_text: str) -> str:
+    """Short description shown in list responses"""
+    return prompt_text[:100] + "..." if len(prompt_text) > 100 else prompt_text
+
+
+def resource_entry(category: str, prompt_name: str, description: str,
+                   arguments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """resources/list entry for one prompt"""
+    return {
+        "uri": f"prompt://{category}/{prompt_name}",
+        "name": f"{category}/{prompt_name}",
+        "description": description,
+        "mimeType": "text/plain"
+    }
+
+
+def prompt_arguments(prompt_text: str) -> List[Dict[str, Any]]:
+    """Extract the advertised arguments from prompt text"""
+    arguments = []
+    if '[recipient]' in prompt_text:
+        arguments.append({
+            "name": "recipient",
+            "description": "The recipient of the email",
+            "required": True
+        })
+    if '[topic]' in prompt_text:
+        arguments.append({
+            "name": "topic",
+            "description": "The topic or subject matter",
+            "required": True
+        })
+    if '[paste text]' in prompt_text:
+        arguments.append({
+            "name": "text",
+            "description": "The text to process",
+            "required": True
+        })
+    return arguments
+
+
+def prompt_entry(category: str, prompt_name: str, description: str,
+                 arguments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """prompts/list entry for one prompt"""
+    return {
+        "name": f"{category}/{prompt_name}",
+        "description": description,
+        "arguments": arguments
+    }
+
+
+def tool_entry(category: str, prompt_name: str, description: str,
+               arguments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """tools/list entry for one prompt"""
+    return {
+        "name": f"{category}/{prompt_name}",
+        "description": f"Generate workplace content using the {prompt_name} prompt",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "input": {
+                    "type": "string",
+                    "description": "The input text or parameters for the prompt"
+                }
+            },
+            "required": ["input"]
+        }
+    }
+
+
+def encode_json(data: Any) -> bytes:
+    """Compact UTF-8 JSON encoding used for pre-serialized payloads"""
+    return kept(dumps(data))
+
+
+def encode_response(message: Any, encode_result: Callable[[str, Dict[str, Any]], Optional[List[Fragment]]]
+                    ) -> Optional[List[Fragment]]:
+    """JSON-RPC response fragments around encode_result(method, params), or None where it has no answer
+
+    Notifications are left to the handlers, which answer them with nothing.
+    """
+    if not isinstance(message, dict) or is_notification(message):
+        return None
+    params = message.get('params', {})
+    if not isinstance(params, dict):
+        return None
+    try:
+        result = encode_result(message.get('method', ''), params)
+    except Exception:
+        return None
+    if result is None:
+        return None
+    return response_parts(message.get('id'), result)
+
+
+# Static framing around the text of pre-encoded prompts/get and tools/call results
+PROMPT_GET_PREFIX = b'{"messages":[{"role":"user","content":{"type":"text","text":"'
+PROMPT_GET_SUFFIX = b'"}}]}'
+TOOL_CALL_PREFIX = b'{"content":[{"type":"text","text":"'
+TOOL_CALL_SUFFIX = b'"}]}'
+
+
+class PromptRecord:
+    """One prompt, found by its "category/name" key, with encodings cached on first use"""
+
+    __slots__ = ('category', 'name', 'text', 'template', 'tool_head', 'resource_body')
+
+    def __init__(self, category: str, name: str, text: str, template: Optional[CompiledTemplate] = None):
+        self.category = category
+        self.name = name
+        self.text = text
+        self.template = CompiledTemplate(text) if template is None else template
+        # Escaped "<prompt text>\n\nInput: " for tools/call
+        self.tool_head: Optional[Fragment] = None
+        # Complete resources/read result
+        self.resource_body: Optional[bytes] = None
+
+    def resource_result(self) -> Dict[str, Any]:
+        """resources/read result for this prompt"""
+        return {
+            "contents": [{
+                "uri": f"{URI_PREFIX}{self.category}/{self.name}",
+                "mimeType": "text/plain",
+                "text": self.text
+            }]
+        }
+
+
+def encode_cursor(tag: str, offset: int) -> str:
+    """Opaque cursor for the page starting at offset of the list tagged tag"""
+    return base64.urlsafe_b64encode(f"{tag}:{offset}".encode('ascii')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """List tag and offset encoded in a cursor from encode_cursor"""
+    try:
+        tag, offset = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+        return tag, int(offset)
+    except (AttributeError, UnicodeError, binascii.Error, ValueError):
+        raise InvalidCursor(cursor)
+
+
+class ListPayload:
+    """A list response: the result dict, its JSON bytes and a content hash
+
+    The result dict may be shared between callers and must be treated as read-only.
+    Compressed copies of the body are made once per content coding and kept.
+    """
+
+    __slots__ = ('result', 'body', 'etag', 'compressed')
+
+    def __init__(self, result: Dict[str, Any], body: Optional[bytes] = None):
+        self.result = result
+        self.body = encode_json(result) if body is None else body
+        # Importing hashlib loads OpenSSL; leave that off the startup path until a list is built
+        from hashlib import sha256
+
+        self.etag = sha256(self.body).hexdigest()[:32]
+        self.compressed: Dict[str, bytes] = {}
+
+    def encoded(self, coding: Optional[str]) -> Tuple[Optional[str], bytes, str]:
+        """Content coding, body and ETag to serve to a client that accepts coding
+
+        Bodies under MIN_COMPRESS_BYTES, or with no coding, are served as
+        they are. Each coding has its own ETag.
+        """
+        if coding is None or len(self.body) < MIN_COMPRESS_BYTES:
+            return None, self.body, self.etag
+        body = self.compressed.get(coding)
+        if body is None:
+            # Racing threads may both compress; either result is correct
+            body = self.compressed[coding] = compress(self.body, coding, static=True)
+        return coding, body, f"{self.etag}-{coding}"
+
+
+# A buffer of packed list entries: bytes, or a memoryview of a mapped snapshot
+Buffer = Union[bytes, memoryview]
+
+
+def pack_entries(encoded: Iterable[bytes]) -> Tuple[bytes, array]:
+    """Encoded entries joined into one buffer, each followed by a comma, and their start offsets
+
+    Entry i is packed[offsets[i]:offsets[i + 1] - 1]; the offsets end with
+    one past the last comma.
+    """
+    pieces = []
+    offsets = array('Q', [0])
+    position = 0
+    for body in encoded:
+        pieces += (body, b',')
+        position += len(body) + 1
+        offsets.append(position)
+    return b''.join(pieces), offsets
+
+
+def list_tag(packed: Buffer) -> str:
+    """Content hash of a list's packed entries, naming that exact list in its cursors"""
+    from hashlib import sha256
+
+    return sha256(packed).hexdigest()[:16]
+
+
+class PackedEntries(Sequence):
+    """List entries decoded from their packed encodings each time they are read
+
+    Stands in for the entry dicts of a ListIndex loaded from a snapshot,
+    where only the encodings are kept and the dicts are rarely needed.
+    """
+
+    def __init__(self, packed: Buffer, offsets: Sequence):
+        self.packed = packed
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return json.loads(bytes(self.packed[self.offsets[index]:self.offsets[index + 1] - 1]))
+
+
+class ListIndex:
+    """Stable ordered entries for one list method, each encoded once
+
+    The encoded entries are packed into one buffer, so a page is a single
+    slice of it and serving any page costs O(page size) whatever the
+    catalog size. Cursors carry the list's tag as well as an offset, so
+    one issued before a reload is refused rather than resuming at the
+    same offset of a different list.
+    """
+
+    def __init__(self, key: str, entries: Sequence, page_size: Optional[int],
+                 packed: Optional[Buffer] = None, offsets: Optional[Sequence] = None,
+                 tag: Optional[str] = None):
+        self.key = key
+        self.entries = entries
+        if packed is None:
+            packed, offsets = pack_entries(encode_json(entry) for entry in entries)
+        self.packed = packed
+        self.offsets = offsets
+        self.tag = list_tag(packed) if tag is None else tag
+        self.page_size = page_size or len(entries)
+        self.first_page = self._build_page(0)
+        self._cached_page = lru_cache(maxsize=PAGE_CACHE_SIZE)(self._build_page)
+
+    @classmethod
+    def from_packed(cls, key: str, packed: Buffer, offsets: Sequence, page_size: Optional[int],
+                    tag: Optional[str] = None) -> 'ListIndex':
+        """An index over entries that were packed earlier, decoding them only when read"""
+        return cls(key, PackedEntries(packed, offsets), page_size, packed, offsets, tag)
+
+    def _build_page(self, offset: int) -> ListPayload:
+        end = min(offset + self.page_size, len(self.entries))
+        body = self.packed[self.offsets[offset]:self.offsets[end] - 1] if end > offset else b''
+        parts = [b'{"', self.key.encode('ascii'), b'":[', body, b']']
+        result = {self.key: self.entries[offset:end]}
+        if end < len(self.entries):
+            next_cursor = encode_cursor(self.tag, end)
+            result["nextCursor"] = next_cursor
+            parts.append(b',"nextCursor":' + encode_json(next_cursor))
+        parts.append(b'}')
+        return ListPayload(result, b''.join(parts))
+
+    def page(self, cursor: Optional[str] = None) -> ListPayload:
+        """Page starting at cursor, or the prebuilt first page without one"""
+        if cursor is None:
+            return self.first_page
+        tag, offset = decode_cursor(cursor)
+        if tag != self.tag or not 0 < offset < len(self.entries):
+            raise InvalidCursor(cursor)
+        return self._cached_page(offset)
+
+
+# What the list responses need of a prompt: (category, name, description, arguments)
+Metadata = Tuple[str, str, str, List[Dict[str, Any]]]
+
+
+class Catalog:
+    """A prompt table plus the structures derived from it
+
+    Derived structures are built on first use and never change afterwards,
+    so a new prompt table always means a new Catalog. Subclasses that keep
+    prompt text elsewhere override rows, names, metadata and record.
+    """
+
+    def __init__(self, prompts: Dict[str, Dict[str, str]], page_size: Optional[int] = DEFAULT_PAGE_SIZE):
+        self.prompts = prompts
+        self.page_size = page_size
+        # One probe answers tools/call and prompts/get names and resource URIs;
+        # keys with an extra '/' could never be addressed, so they are left out
+        self.records: Dict[str, PromptRecord] = {
+            f"{category}/{prompt_name}": PromptRecord(category, prompt_name, prompt_text)
+            for category, category_prompts in prompts.items() if '/' not in category
+            for prompt_name, prompt_text in category_prompts.items() if '/' not in prompt_name
+        }
+
+    def rows(self) -> Iterator[Tuple[str, str, str]]:
+        """(category, name, text) for every prompt, in list order"""
+        for category, category_prompts in self.prompts.items():
+            for prompt_name, prompt_text in category_prompts.items():
+                yield category, prompt_name, prompt_text
+
+    def names(self) -> Iterable[str]:
+        """Every addressable "category/name", in no particular order"""
+        return self.records.keys()
+
+    def metadata(self) -> Iterator[Metadata]:
+        """List metadata for every prompt, in list order"""
+        for category, prompt_name, prompt_text in self.rows():
+            yield category, prompt_name, describe(prompt_text), prompt_arguments(prompt_text)
+
+    def _entries(self, build) -> List[Dict[str, Any]]:
+        return [build(*metadata) for metadata in self.metadata()]
+
+    @cached_property
+    def resources_list(self) -> ListIndex:
+        """Paged resources/list responses"""
+        return ListIndex("resources", self._entries(resource_entry), self.page_size)
+
+    @cached_property
+    def prompts_list(self) -> ListIndex:
+        """Paged prompts/list responses"""
+        return ListIndex("prompts", self._entries(prompt_entry), self.page_size)
+
+    @cached_property
+    def tools_list(self) -> ListIndex:
+        """Paged tools/list responses"""
+        return ListIndex("tools", self._entries(tool_entry), self.page_size)
+
+    @cached_property
+    def search_index(self) -> SearchIndex:
+        """Full-text index over names, categories and text, in prompts/list order"""
+        return SearchIndex(f"{category} {prompt_name} {prompt_text}" for category, prompt_name, prompt_text in self.rows())
+
+    @cached_property
+    def completion_index(self) -> CompletionIndex:
+        """Prefix indexes over names, categories and resource URIs for completion/complete"""
+        return CompletionIndex(self.names(), URI_PREFIX)
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> Dict[str, Any]:
+        """prompts/search result: best matching prompts/list entries with scores"""
+        entries = self.prompts_list.entries
+        return {
+            "prompts": [
+                dict(entries[doc_id], score=round(score, 4))
+                for doc_id, score in self.search_index.search(query, limit)
+            ]
+        }
+
+    def record(self, name: Any) -> Optional[PromptRecord]:
+        """The prompt called "category/name", if there is one"""
+        return self.records.get(name) if isinstance(name, str) else None
+
+    def record_for_uri(self, uri: Any) -> Optional[PromptRecord]:
+        """The prompt behind a prompt://category/name URI, if there is one"""
+        if not isinstance(uri, str) or not uri.startswith(URI_PREFIX):
+            return None
+        return self.record(uri[len(URI_PREFIX):])
+
+    def _encode_page(self, index: ListIndex, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        try:
+            return [index.page(params.get('cursor')).body]
+        except InvalidCursor:
+            return None
+
+    def _encode_resources_list(self, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        return self._encode_page(self.resources_list, params)
+
+    def _encode_prompts_list(self, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        return self._encode_page(self.prompts_list, params)
+
+    def _encode_tools_list(self, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        return self._encode_page(self.tools_list, params)
+
+    def _encode_resources_read(self, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        record = self.record_for_uri(params.get('uri'))
+        if record is None:
+            return None
+        body = record.resource_body
+        if body is None:
+            body = record.resource_body = encode_json(record.resource_result())
+        return [body]
+
+    def _encode_prompts_get(self, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        arguments = params.get('arguments', {})
+        record = self.record(params.get('name'))
+        if record is None or not isinstance(arguments, dict):
+            return None
+        return [PROMPT_GET_PREFIX, *record.template.render_encoded(arguments), PROMPT_GET_SUFFIX]
+
+    def _encode_tools_call(self, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        arguments = params.get('arguments', {})
+        record = self.record(params.get('name'))
+        if record is None or not isinstance(arguments, dict):
+            return None
+        return [TOOL_CALL_PREFIX, self._tool_head(record), string_body(str(arguments.get('input', ''))), TOOL_CALL_SUFFIX]
+
+    @staticmethod
+    def _tool_head(record: PromptRecord) -> Fragment:
+        head = record.tool_head
+        if head is None:
+            head = record.tool_head = kept_string_body(f"{record.text}\n\nInput: ")
+        return head
+
+    def encode_result(self, method: str, params: Dict[str, Any]) -> Optional[List[Fragment]]:
+        """Result fragments for list, resources/read, prompts/get and tools/call, reusing pre-encoded parts
+
+        Returns None whenever the request should go through the regular
+        handler instead, which includes every error case.
+        """
+        encoder = self.ENCODERS.get(method)
+        if encoder is None:
+            return None
+        return encoder(self, params)
+
+    def stream_result(self, method: str, params: Dict[str, Any]) -> Optional[Iterator[Fragment]]:
+        """encode_result for tools/call with the input escaped piece by piece as the result is consumed
+
+        A tools/call result is the one that grows with the request; other
+        methods, and every error case, return None.
+        """
+        if method != 'tools/call':
+            return None
+        arguments = params.get('arguments', {})
+        record = self.record(params.get('name'))
+        if record is None or not isinstance(arguments, dict):
+            return None
+        return itertools.chain((TOOL_CALL_PREFIX, self._tool_head(record)),
+                               string_body_pieces(str(arguments.get('input', ''))), (TOOL_CALL_SUFFIX,))
+
+    def warm(self) -> 'Catalog':
+        """Build every derived structure now instead of on first use"""
+        self.resources_list, self.prompts_list, self.tools_list, self.search_index, self.completion_index
+        for index in (self.resources_list, self.prompts_list, self.tools_list):
+            for coding in ENCODINGS:
+                index.first_page.encoded(coding)
+        return self
+
+    # Per-method fast paths, shared by every catalog
+    ENCODERS = {
+        'resources/list': _encode_resources_list,
+        'resources/read': _encode_resources_read,
+        'prompts/list': _encode_prompts_list,
+        'prompts/get': _encode_prompts_get,
+        'tools/list': _encode_tools_list,
+        'tools/call': _encode_tools_call,
+    }
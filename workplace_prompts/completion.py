@@ -0,0 +1,92 @@
+"""
+Completion
+Prefix indexes behind completion/complete. Prompt names are kept as one
+sorted array, so the names starting with a prefix are a contiguous run
+found by two binary searches: the first N of the run are the matches, in
+order, and its length is the total. Resource URIs are the URI prefix plus
+a name and share the array; categories get a small array of their own.
+"""
+
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Most values a completion result may carry, per the MCP specification
+MAX_COMPLETIONS = 100
+
+# Argument names whose values the catalog knows
+NAME = 'name'
+CATEGORY = 'category'
+URI = 'uri'
+
+
+def _successor(prefix: str) -> Optional[str]:
+    """The first string after every string that starts with prefix, or None if there is none"""
+    prefix = prefix.rstrip('\U0010ffff')
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _categories(names: Sequence[str]) -> Iterator[str]:
+    """The category of every "category/name" in sorted names, visiting one name per category"""
+    position = 0
+    while position < len(names):
+        category = names[position].partition('/')[0]
+        yield category
+        # Every "category/..." name sorts before category + '0', '0' being the character after '/'
+        position = bisect_left(names, category + '0', position)
+
+
+class PrefixIndex:
+    """Sorted strings, answering which of them start with a prefix in O(len(prefix) * log n + limit)"""
+
+    def __init__(self, values: Iterable[str]):
+        # Already sorted input, such as snapshot names, sorts in one linear pass
+        self.values: List[str] = sorted(values)
+
+    def range(self, prefix: str) -> Tuple[int, int]:
+        """Start and end of the run of values starting with prefix"""
+        values = self.values
+        start = bisect_left(values, prefix)
+        bound = _successor(prefix)
+        end = len(values) if bound is None else bisect_left(values, bound, start)
+        return start, end
+
+    def complete(self, prefix: str, limit: int) -> Tuple[List[str], int]:
+        """The first limit values starting with prefix, in order, and how many there are in all"""
+        start, end = self.range(prefix)
+        return self.values[start:min(end, start + limit)], end - start
+
+
+class CompletionIndex:
+    """Completions for prompt names, categories and resource URIs of one catalog"""
+
+    def __init__(self, names: Iterable[str], uri_prefix: str):
+        self.names = PrefixIndex(names)
+        self.categories = PrefixIndex(_categories(self.names.values))
+        self.uri_prefix = uri_prefix
+
+    def complete(self, argument: str, value: str, category: Optional[str] = None,
+                 limit: int = MAX_COMPLETIONS) -> Tuple[List[str], int]:
+        """Up to limit completions of value for the argument called argument, and their total
+
+        A category, from the arguments already filled in, narrows name
+        completions to it while value has no '/'. Arguments the catalog has
+        no values for complete to nothing.
+        """
+        if argument == NAME:
+            if category is not None and '/' not in value:
+                value = f"{category}/{value}"
+            return self.names.complete(value, limit)
+        if argument == CATEGORY:
+            return self.categories.complete(value, limit)
+        if argument == URI:
+            prefix = self.uri_prefix
+            if value.startswith(prefix):
+                names, total = self.names.complete(value[len(prefix):], limit)
+            elif prefix.startswith(value):
+                names, total = self.names.complete('', limit)
+            else:
+                return [], 0
+            return [prefix + name for name in names], total
+        return [], 0
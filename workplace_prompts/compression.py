@@ -0,0 +1,91 @@
+"""
+Response compression
+Content codings for HTTP responses: gzip from the standard library, plus
+zstd and brotli when zstandard or brotli is installed. Static payloads are
+compressed once at a high level and cached by their owner; dynamic bodies
+are compressed per response at a cheap level, and streamed bodies chunk by
+chunk, flushing after each so the client sees every chunk as it is sent.
+"""
+
+import gzip
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies shorter than this go out uncompressed; below it the saving is a
+# few hundred bytes at best and not worth the CPU or the extra header
+MIN_COMPRESS_BYTES = 1024
+
+# (static level, dynamic level) per coding
+LEVELS = {
+    'br': (11, 4),
+    'zstd': (19, 3),
+    'gzip': (9, 5),
+}
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # mtime=0 keeps the output, and so its ETag, stable across runs and workers
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _zstd(body: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+def _brotli(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+def _gzip_stream(level: int) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+def _zstd_stream(level: int) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return (lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), compressor.flush
+
+
+def _brotli_stream(level: int) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    compressor = brotli.Compressor(quality=level)
+    return (lambda data: compressor.process(data) + compressor.flush()), compressor.finish
+
+
+COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {'gzip': _gzip}
+# Per coding, a factory of (compress and flush one chunk, finish the stream)
+STREAMERS = {'gzip': _gzip_stream}
+if zstandard is not None:
+    COMPRESSORS['zstd'] = _zstd
+    STREAMERS['zstd'] = _zstd_stream
+if brotli is not None:
+    COMPRESSORS['br'] = _brotli
+    STREAMERS['br'] = _brotli_stream
+
+# Codings this process can produce, best first
+ENCODINGS: Tuple[str, ...] = tuple(coding for coding in LEVELS if coding in COMPRESSORS)
+
+
+def compress(body: bytes, coding: str, static: bool = False) -> bytes:
+    """body in the given content coding, at the static or the dynamic level"""
+    static_level, dynamic_level = LEVELS[coding]
+    return COMPRESSORS[coding](body, static_level if static else dynamic_level)
+
+
+def compress_stream(body: Iterable[bytes], coding: str) -> Iterator[bytes]:
+    """A streamed body in the given content coding at the dynamic level, flushed after every chunk"""
+    compress_chunk, finish = STREAMERS[coding](LEVELS[coding][1])
+    for data in body:
+        compressed = compress_chunk(data)
+        if compressed:
+            yield compressed
+    yield finish()
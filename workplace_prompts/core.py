@@ -0,0 +1,398 @@
+"""
+MCP core
+Method handlers over a swappable catalog, dispatched from a table built once,
+plus the pre-encoded fast paths. Both transports serve requests through it.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cache import CACHED_METHODS, CachedResult, ResultCache, cache_key
+from .catalog import (Catalog, InvalidCursor, ListIndex, PromptRecord, URI_PREFIX, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT,
+                      encode_response)
+from .compression import MIN_COMPRESS_BYTES
+from .encoding import NEWLINE, Fragment, dumps, join, response_parts
+from .jsonrpc import INTERNAL_ERROR, METHOD_NOT_FOUND, error_response, handle_message, is_notification
+from .metrics import Metrics, error_codes
+from .prompts import PROMPTS
+
+RENDER_BATCH = 'prompts/renderBatch'
+
+# Streamed rows are handed to the transport in chunks of about this many bytes
+BATCH_CHUNK_BYTES = 64 * 1024
+
+# Row lines of a streamed prompts/renderBatch over JSON-RPC: one notification
+# per row, {"id": <request id>, "row": {"index": ..., "text": ...}}
+RENDER_BATCH_NOTIFICATION = b'{"jsonrpc":"2.0","method":"notifications/prompts/renderBatch","params":{"id":'
+
+ROW_NOT_AN_OBJECT = "Arguments must be an object"
+ROW_TOO_LARGE = "Row too large"
+
+# Stands in for an uploaded row over the request size limit, which is skipped unparsed
+OVERSIZED_ROW = object()
+
+
+def invalid_params(message: str) -> Dict[str, Any]:
+    """A handler error; handlers report these inside the result"""
+    return {"error": {"code": -32602, "message": message}}
+
+
+def _missing(name: str, invalid: str, not_found: str) -> Dict[str, Any]:
+    # Names that are not exactly "category/name" are malformed rather than unknown
+    return invalid_params(invalid if len(name.split('/')) != 2 else not_found)
+
+
+def batch_summary(rows: int, errors: int, seconds: float) -> Dict[str, Any]:
+    """Closing statistics of a prompts/renderBatch run"""
+    return {
+        "rows": rows,
+        "errors": errors,
+        "seconds": round(seconds, 6),
+        "rowsPerSecond": round(rows / seconds, 1) if seconds > 0 else None
+    }
+
+
+def render_rows(record: PromptRecord, rows: Iterable[Any], head: bytes, tail: bytes,
+                finish: Callable[[Dict[str, Any]], List[Fragment]]) -> Iterator[List[Fragment]]:
+    """Render each argument map in rows, yielding encoded lines in chunks
+
+    Every row becomes head + {"index": i, "text": ...} + tail, or an "error"
+    in place of "text" when the row is not an object or is OVERSIZED_ROW. Rows are consumed and
+    rendered lazily, so memory stays flat however many there are. The last
+    chunk ends with finish(batch_summary(...)).
+    """
+    template = record.template
+    started = time.perf_counter()
+    rendered = errors = 0
+    chunk: List[Fragment] = []
+    size = 0
+    for index, arguments in enumerate(rows):
+        if isinstance(arguments, dict):
+            line = [head, b'{"index":%d,"text":"' % index, *template.render_encoded(arguments), b'"}', tail]
+        else:
+            errors += 1
+            error = ROW_TOO_LARGE if arguments is OVERSIZED_ROW else ROW_NOT_AN_OBJECT
+            line = [head, b'{"index":%d,"error":"%s"}' % (index, error.encode('ascii')), tail]
+        rendered += 1
+        chunk.extend(line)
+        size += sum(map(len, line))
+        if size >= BATCH_CHUNK_BYTES:
+            yield chunk
+            chunk = []
+            size = 0
+    chunk.extend(finish(batch_summary(rendered, errors, time.perf_counter() - started)))
+    yield chunk
+
+
+class Dispatcher:
+    """MCP methods over the current catalog, independent of transport"""
+
+    def __init__(self, catalog: Optional[Catalog] = None, metrics: Optional[Metrics] = None,
+                 cache: Optional[ResultCache] = None):
+        # Replaced wholesale on reload; handlers read it once per request
+        self.catalog = catalog or Catalog(PROMPTS)
+        self.metrics = metrics or Metrics()
+        self.set_cache(cache)
+        self.handlers = {
+            'initialize': self.handle_initialize,
+            'resources/list': self.handle_resources_list,
+            'resources/read': self.handle_resources_read,
+            'prompts/list': self.handle_prompts_list,
+            'prompts/get': self.handle_prompts_get,
+            'prompts/search': self.handle_prompts_search,
+            'tools/list': self.handle_tools_list,
+            'tools/call': self.handle_tools_call,
+            'completion/complete': self.handle_completion_complete,
+            'server/stats': self.handle_server_stats,
+            RENDER_BATCH: self.handle_prompts_render_batch
+        }
+
+    @property
+    def prompts(self) -> Dict[str, Dict[str, str]]:
+        return self.catalog.prompts
+
+    def set_catalog(self, catalog: Catalog):
+        """Swap in a fully built catalog, emptying the result cache"""
+        self.catalog = catalog
+        cache = self.cache
+        if cache is not None:
+            cache.reset(catalog)
+            self.metrics.cache_events(invalidations=1, entries=0, size=0)
+
+    def set_cache(self, cache: Optional[ResultCache]):
+        """Answer cached_result through cache, or render every result with None"""
+        self.cache = cache
+        if cache is not None:
+            cache.reset(self.catalog)
+
+    def cached_result(self, method: str, params: Dict[str, Any]
+                      ) -> Tuple[Optional[CachedResult], Optional[List[Fragment]]]:
+        """The catalog's encode_result, for a client that accepts compression, through the result cache
+
+        Returns the cache entry when the result was found or has just been
+        rendered into one, else the rendered fragments of a result that is
+        not kept, or None for both where encode_result has no answer. Only
+        results large enough to be compressed are kept: rendering one costs
+        about as much as hashing its arguments, compressing it several times
+        more, so what a hit saves is the compression.
+        """
+        catalog = self.catalog
+        cache = self.cache
+        if cache is None or method not in CACHED_METHODS:
+            return None, catalog.encode_result(method, params)
+        record = catalog.record(params.get('name'))
+        if record is None:
+            return None, catalog.encode_result(method, params)
+        # A prompt whose text and arguments together fall short of MIN_COMPRESS_BYTES is never kept
+        key = cache_key(method, params, MIN_COMPRESS_BYTES - len(record.text), cache.max_entry_bytes)
+        if key is None:
+            return None, catalog.encode_result(method, params)
+        entry = cache.get(catalog, key)
+        if entry is not None:
+            self.metrics.cache_hit()
+            return entry, None
+        # Errors, which come back as None and go through the handlers, are never cached
+        result = catalog.encode_result(method, params)
+        if result is None:
+            return None, None
+        size = sum(map(len, result))
+        if size < MIN_COMPRESS_BYTES or size > cache.max_entry_bytes:
+            self.metrics.cache_events(misses=1)
+            return None, result
+        entry = CachedResult(key, join(result))
+        evicted = cache.put(catalog, entry)
+        self.metrics.cache_events(misses=1, evictions=evicted, entries=len(cache.entries), size=cache.size)
+        return entry, None
+
+    def compressed_result(self, entry: CachedResult, coding: str) -> bytes:
+        """A cached result in the given content coding, compressed once and kept with it"""
+        body = entry.compressed.get(coding)
+        if body is None:
+            cache = self.cache
+            body, evicted = cache.encoded(entry, coding)
+            self.metrics.cache_events(evictions=evicted, entries=len(cache.entries), size=cache.size)
+        return body
+
+    def list_page(self, index: ListIndex, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Result for the list page selected by params['cursor']"""
+        try:
+            return index.page(params.get('cursor')).result
+        except InvalidCursor:
+            return invalid_params("Invalid cursor")
+
+    def handle_initialize(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle initialization request"""
+        return {
+            "protocolVersion": "1.0",
+            "serverInfo": {
+                "name": "workplace-prompts-server",
+                "version": "1.0.0"
+            },
+            "capabilities": {
+                "resources": {},
+                "tools": {},
+                "prompts": {},
+                "completions": {}
+            }
+        }
+
+    def handle_resources_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """List all available prompt resources"""
+        return self.list_page(self.catalog.resources_list, params)
+
+    def handle_resources_read(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Read a specific prompt resource"""
+        uri = params.get('uri', '')
+        record = self.catalog.record_for_uri(uri)
+        if record is not None:
+            return record.resource_result()
+
+        # Parse URI: prompt://category/prompt_name
+        if not uri.startswith(URI_PREFIX):
+            return invalid_params("Invalid URI format")
+        return _missing(uri[len(URI_PREFIX):], "Invalid URI path", "Resource not found")
+
+    def handle_prompts_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """List all available prompts"""
+        return self.list_page(self.catalog.prompts_list, params)
+
+    def handle_prompts_get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Get a specific prompt with arguments filled in"""
+        prompt_name = params.get('name', '')
+        arguments = params.get('arguments', {})
+
+        record = self.catalog.record(prompt_name)
+        if record is None:
+            return _missing(prompt_name, "Invalid prompt name", "Prompt not found")
+
+        return {
+            "messages": [{
+                "role": "user",
+                "content": {
+                    "type": "text",
+                    "text": record.template.render(arguments)
+                }
+            }]
+        }
+
+    def render_batch_source(self, params: Dict[str, Any]) -> Tuple[Optional[PromptRecord], Optional[Dict[str, Any]]]:
+        """The prompt a prompts/renderBatch request renders, or the error to answer it with"""
+        prompt_name = params.get('name', '')
+        record = self.catalog.record(prompt_name)
+        if record is None:
+            return None, _missing(prompt_name, "Invalid prompt name", "Prompt not found")
+        return record, None
+
+    def handle_prompts_render_batch(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Render one prompt against a list of argument maps, collecting every row
+
+        Used where the response cannot be streamed, such as inside a batch
+        array; stream_response serves single requests row by row.
+        """
+        record, error = self.render_batch_source(params)
+        if error is not None:
+            return error
+        rows = params.get('arguments')
+        if not isinstance(rows, list):
+            return invalid_params("arguments must be a list of argument maps")
+
+        started = time.perf_counter()
+        results = []
+        errors = 0
+        for index, arguments in enumerate(rows):
+            if isinstance(arguments, dict):
+                results.append({"index": index, "text": record.template.render(arguments)})
+            else:
+                errors += 1
+                results.append({"index": index, "error": ROW_NOT_AN_OBJECT})
+        return {"results": results, **batch_summary(len(rows), errors, time.perf_counter() - started)}
+
+    def handle_prompts_search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Search prompts by name, category and text"""
+        if not isinstance(params, dict):
+            return invalid_params("params must be an object")
+        query = params.get('query')
+        limit = params.get('limit', DEFAULT_SEARCH_LIMIT)
+
+        if not isinstance(query, str) or not query.strip():
+            return invalid_params("Missing query")
+        if not isinstance(limit, int) or not 1 <= limit <= MAX_SEARCH_LIMIT:
+            return invalid_params(f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+
+        return self.catalog.search(query, limit)
+
+    def handle_tools_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """List all available tools"""
+        return self.list_page(self.catalog.tools_list, params)
+
+    def handle_tools_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a tool (return the prompt with input)"""
+        tool_name = params.get('name', '')
+        arguments = params.get('arguments', {})
+
+        record = self.catalog.record(tool_name)
+        if record is None:
+            return _missing(tool_name, "Invalid tool name", "Tool not found")
+
+        return {
+            "content": [{
+                "type": "text",
+                "text": f"{record.text}\n\nInput: {arguments.get('input', '')}"
+            }]
+        }
+
+    def handle_completion_complete(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Complete a prompt name, category or resource URI from the catalog's prefix index"""
+        if not isinstance(params, dict):
+            return invalid_params("params must be an object")
+        ref = params.get('ref')
+        argument = params.get('argument')
+        if not isinstance(ref, dict) or not isinstance(argument, dict):
+            return invalid_params("Missing ref or argument")
+        name = argument.get('name')
+        value = argument.get('value', '')
+        if not isinstance(name, str) or not isinstance(value, str):
+            return invalid_params("Invalid argument")
+
+        catalog = self.catalog
+        if ref.get('type') == 'ref/prompt':
+            # The prompt's own name is what is being completed when the argument is its name
+            prompt_name = ref.get('name', '')
+            if name != 'name' and catalog.record(prompt_name) is None:
+                return _missing(str(prompt_name), "Invalid prompt name", "Prompt not found")
+        elif ref.get('type') != 'ref/resource':
+            return invalid_params("Invalid ref type")
+
+        context = params.get('context')
+        filled = context.get('arguments') if isinstance(context, dict) else None
+        category = filled.get('category') if isinstance(filled, dict) else None
+        values, total = catalog.completion_index.complete(
+            name, value, category if isinstance(category, str) else None)
+        return {"completion": {"values": values, "total": total, "hasMore": total > len(values)}}
+
+    def handle_server_stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle server/stats: request metrics since startup"""
+        return self.metrics.snapshot()
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Route request to appropriate handler"""
+        method = request.get('method', '')
+        handler = self.handlers.get(method)
+        if handler is None:
+            return error_response(request.get('id'), METHOD_NOT_FOUND, f"Method not found: {method}")
+        return {
+            "jsonrpc": "2.0",
+            "id": request.get('id'),
+            "result": handler(request.get('params', {}))
+        }
+
+    def respond_message(self, message: Any) -> Any:
+        """Handle a parsed request or batch array, turning failures into JSON-RPC errors
+
+        None when there is nothing to answer: a notification, or a batch of them.
+        """
+        try:
+            return handle_message(message, self.handle_request)
+        except Exception as e:
+            if is_notification(message):
+                return None
+            return error_response(None, INTERNAL_ERROR, f"Internal error: {str(e)}")
+
+    def stream_response(self, message: Any, prefix: bytes = b'',
+                        end: bytes = NEWLINE) -> Optional[Iterator[List[Fragment]]]:
+        """Chunks of response messages for a request answered incrementally, else None
+
+        A valid prompts/renderBatch request is answered with one
+        notification per row followed by its JSON-RPC response, which
+        carries the batch_summary. Each message is framed by prefix and
+        end: newline-delimited by default. Anything else, including a
+        renderBatch request with bad params, goes through respond_encoded.
+        """
+        if not isinstance(message, dict) or message.get('method') != RENDER_BATCH or is_notification(message):
+            return None
+        params = message.get('params', {})
+        if not isinstance(params, dict) or not isinstance(params.get('arguments'), list):
+            return None
+        record = self.catalog.record(params.get('name'))
+        if record is None:
+            return None
+
+        request_id = message.get('id')
+        head = prefix + RENDER_BATCH_NOTIFICATION + dumps(request_id) + b',"row":'
+        return render_rows(record, params['arguments'], head, b'}}' + end,
+                           lambda summary: [prefix, *response_parts(request_id, [dumps(summary)]), end])
+
+    def respond_encoded(self, message: Any) -> Tuple[List[Fragment], Tuple[int, ...]]:
+        """Encoded response to a parsed message, and the error codes it carries
+
+        Takes the catalog's pre-encoded fast path when it can answer the
+        request and falls back to the handlers otherwise. Messages that
+        need no answer get no fragments.
+        """
+        parts = encode_response(message, self.catalog.encode_result)
+        if parts is not None:
+            return parts, ()
+        response = self.respond_message(message)
+        if response is None:
+            return [], ()
+        return [dumps(response)], error_codes(response)
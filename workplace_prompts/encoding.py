@@ -0,0 +1,157 @@
+"""
+Response encoding
+UTF-8 JSON bytes for both transports, built from fragments so static parts
+are encoded once and large strings are copied as few times as possible.
+Uses orjson when it is installed and the standard library otherwise.
+"""
+
+import json
+import os
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import Any, Iterable, Iterator, List, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# Encoded output pieces; memoryviews let a string body be written without its quotes
+Fragment = Union[bytes, memoryview]
+
+# What a transport gets back for one request line: the fragments of one
+# response line, or an iterator of chunks of whole lines for responses that are streamed
+Response = Union[List[Fragment], Iterator[List[Fragment]]]
+
+NEWLINE = b'\n'
+
+# Most buffers os.writev accepts in one call on common platforms
+IOV_MAX = 1024
+
+# Size of the pieces a streamed response is written in
+CHUNK_BYTES = 64 * 1024
+
+
+def _dumps_stdlib(data: Any) -> bytes:
+    try:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    except UnicodeEncodeError:
+        # Lone surrogates cannot be UTF-8 encoded; fall back to ASCII escapes
+        return json.dumps(data, separators=(',', ':')).encode('ascii')
+
+
+def dumps(data: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # Integers wider than 64 bits, non-string keys, lone surrogates
+            pass
+    return _dumps_stdlib(data)
+
+
+def encode_string(text: str) -> bytes:
+    """A JSON string literal, quotes included"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(text)
+        except TypeError:
+            pass
+    try:
+        return encode_basestring(text).encode('utf-8')
+    except UnicodeEncodeError:
+        return encode_basestring_ascii(text).encode('ascii')
+
+
+def string_body(text: str) -> Fragment:
+    """The escaped contents of a JSON string literal, without copying off the quotes"""
+    return memoryview(encode_string(text))[1:-1]
+
+
+def kept(data: bytes) -> bytes:
+    """An exact-size copy of encoder output that is cached rather than sent once
+
+    orjson's output keeps its whole working buffer, 1 KiB at the least, so
+    small fragments held for the life of a catalog are copied down first.
+    """
+    return bytes(memoryview(data))
+
+
+def kept_string_body(text: str) -> bytes:
+    """string_body for a fragment that is cached, as an exact-size copy"""
+    return encode_string(text)[1:-1]
+
+
+def string_body_pieces(text: str, size: int = CHUNK_BYTES) -> Iterator[Fragment]:
+    """string_body of text in pieces of size characters, each escaped only when it is reached"""
+    # JSON escapes one code point at a time, so any split point is safe
+    for start in range(0, len(text), size):
+        yield string_body(text[start:start + size])
+
+
+def response_parts(request_id: Any, result: List[Fragment]) -> List[Fragment]:
+    """Fragments of a JSON-RPC success response around already-encoded result fragments"""
+    return [b'{"jsonrpc":"2.0","id":', dumps(request_id), b',"result":', *result, b'}']
+
+
+def stream_response_parts(request_id: Any, result: Iterable[Fragment]) -> Iterator[Fragment]:
+    """response_parts around result fragments that are produced as they are consumed"""
+    yield b'{"jsonrpc":"2.0","id":'
+    yield dumps(request_id)
+    yield b',"result":'
+    yield from result
+    yield b'}'
+
+
+def join(parts: List[Fragment]) -> bytes:
+    return b''.join(parts)
+
+
+def chunks(parts: Iterable[Fragment], size: int = CHUNK_BYTES) -> Iterator[List[Fragment]]:
+    """Fragments regrouped into lists of about size bytes, slicing large ones without copying"""
+    chunk: List[Fragment] = []
+    filled = 0
+    for part in parts:
+        view = memoryview(part)
+        while view:
+            piece = view[:size - filled]
+            view = view[len(piece):]
+            chunk.append(piece)
+            filled += len(piece)
+            if filled >= size:
+                yield chunk
+                chunk = []
+                filled = 0
+    if chunk:
+        yield chunk
+
+
+def write_parts(stream, parts: List[Fragment]):
+    """Write fragments to a binary stream, in a single writev call where possible
+
+    Goes straight to the file descriptor so large fragments are never copied
+    into a joined buffer; falls back to stream.write where there is no fd.
+    """
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        fd = None
+    if fd is None or not hasattr(os, 'writev'):
+        for part in parts:
+            stream.write(part)
+        stream.flush()
+        return
+
+    stream.flush()
+    views = [memoryview(part) for part in parts if len(part)]
+    start = 0
+    while start < len(views):
+        written = os.writev(fd, views[start:start + IOV_MAX])
+        # Skip fully written buffers and trim a partially written one
+        while start < len(views) and written >= len(views[start]):
+            written -= len(views[start])
+            start += 1
+        if written:
+            views[start] = views[start][written:]
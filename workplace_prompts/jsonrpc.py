@@ -0,0 +1,60 @@
+"""
+JSON-RPC 2.0 framing shared by both transports
+Error responses and dispatch of single requests, notifications and batch arrays
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# Implementation-defined server error: work turned away under load
+SERVER_OVERLOADED = -32001
+
+
+def error_response(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """A JSON-RPC error response"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {
+            "code": code,
+            "message": message
+        }
+    }
+
+
+def is_notification(message: Any) -> bool:
+    """Whether message is a notification: a request object without an id, which is never answered"""
+    return isinstance(message, dict) and 'id' not in message
+
+
+def _handle_batch_item(item: Any, handle_request: Callable[[Dict[str, Any]], Dict[str, Any]]
+                       ) -> Optional[Dict[str, Any]]:
+    if not isinstance(item, dict):
+        return error_response(None, INVALID_REQUEST, "Invalid Request")
+    try:
+        response = handle_request(item)
+    except Exception as e:
+        response = error_response(item.get('id'), INTERNAL_ERROR, f"Internal error: {str(e)}")
+    return None if is_notification(item) else response
+
+
+def handle_message(message: Any, handle_request: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Any:
+    """Dispatch a parsed message: a single request, or a batch array answered with one array
+
+    Each batch member goes through handle_request on its own, so one failing
+    member yields an error entry instead of failing the whole batch.
+    Notifications are handled but left out of the answer, which is None
+    when nothing is left to send.
+    """
+    if isinstance(message, list):
+        if not message:
+            return error_response(None, INVALID_REQUEST, "Invalid Request: empty batch")
+        responses = [response for response in (_handle_batch_item(item, handle_request) for item in message)
+                     if response is not None]
+        return responses or None
+    response = handle_request(message)
+    return None if is_notification(message) else response
@@ -0,0 +1,158 @@
+"""
+External prompt catalogs
+Loads a catalog from a JSON file, a directory, a snapshot or a SQLite store and watches
+it for changes, rebuilding off the request path and handing over a finished
+Catalog
+"""
+
+import json
+import os
+import sys
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from .catalog import Catalog
+from .snapshot import SnapshotCatalog, is_snapshot
+
+# Environment variable both servers read when --catalog is not given
+CATALOG_ENV = 'WORKPLACE_PROMPTS_CATALOG'
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def _validate(prompts, source: str) -> Dict[str, Dict[str, str]]:
+    if not isinstance(prompts, dict):
+        raise ValueError(f"{source}: expected an object of categories")
+    for category, category_prompts in prompts.items():
+        if not isinstance(category_prompts, dict):
+            raise ValueError(f"{source}: category {category!r} must map names to prompt text")
+        for name, text in category_prompts.items():
+            if not isinstance(text, str):
+                raise ValueError(f"{source}: prompt {category}/{name} must be a string")
+            if '/' in category or '/' in name:
+                raise ValueError(f"{source}: '/' is not allowed in {category}/{name}")
+    return prompts
+
+
+def _load_json(path: str) -> Dict[str, Dict[str, str]]:
+    with open(path, encoding='utf-8') as f:
+        try:
+            prompts = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}")
+    return _validate(prompts, path)
+
+
+def load_prompts(path: str) -> Dict[str, Dict[str, str]]:
+    """Read a {category: {name: text}} table from a JSON file or a directory
+
+    A directory may hold <category>/<name>.txt files and top-level *.json
+    files in the same format as a single JSON catalog.
+    """
+    if not os.path.isdir(path):
+        return _load_json(path)
+
+    prompts: Dict[str, Dict[str, str]] = {}
+    for entry in sorted(os.listdir(path)):
+        full_path = os.path.join(path, entry)
+        if os.path.isdir(full_path):
+            category_prompts = prompts.setdefault(entry, {})
+            for file_name in sorted(os.listdir(full_path)):
+                if file_name.endswith('.txt'):
+                    with open(os.path.join(full_path, file_name), encoding='utf-8') as f:
+                        category_prompts[file_name[:-4]] = f.read().rstrip('\n')
+        elif entry.endswith('.json'):
+            for category, category_prompts in _load_json(full_path).items():
+                prompts.setdefault(category, {}).update(category_prompts)
+    return _validate(prompts, path)
+
+
+def source_signature(path: str) -> Signature:
+    """Cheap fingerprint of a catalog source: paths, mtimes and sizes"""
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return ((path, stat.st_mtime_ns, stat.st_size),)
+
+    signature = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file_name in sorted(files):
+            full_path = os.path.join(root, file_name)
+            stat = os.stat(full_path)
+            signature.append((full_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def load_catalog(path: str, warm: bool = True) -> Catalog:
+    """Load a catalog and, unless warm is False, build all of its derived structures
+
+    A snapshot is mapped and restored from as needed. A SQLite store is
+    served from the file, with only its metadata loaded.
+    """
+    if is_snapshot(path):
+        catalog = SnapshotCatalog(path)
+    else:
+        # sqlite3 and tempfile add to every startup and only stores need them
+        from .store import SQLiteCatalog, is_store
+
+        catalog = SQLiteCatalog(path) if is_store(path) else Catalog(load_prompts(path))
+    return catalog.warm() if warm else catalog
+
+
+class CatalogWatcher:
+    """Polls a catalog source and publishes a rebuilt Catalog when it changes
+
+    The new Catalog is loaded and fully built on the watcher thread and only
+    then passed to on_change, which swaps it in with a single assignment.
+    Requests already running keep the Catalog they started with. A source
+    that fails to load is reported on stderr and the current catalog stays.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[Catalog], None], interval: float = 1.0):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._signature: Optional[Signature] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self, warm: bool = True) -> Catalog:
+        """Load the source now and remember its signature
+
+        With warm False the derived structures are left to be built on
+        first use, for a faster start. Reloads always build them up front.
+        """
+        signature = source_signature(self.path)
+        catalog = load_catalog(self.path, warm)
+        self._signature = signature
+        return catalog
+
+    def check(self) -> bool:
+        """Reload if the source changed; True when a new catalog was published"""
+        try:
+            signature = source_signature(self.path)
+            if signature == self._signature:
+                return False
+            # Remember failed sources too, so a broken file is reported once
+            self._signature = signature
+            catalog = load_catalog(self.path)
+        except (OSError, ValueError) as e:
+            print(f"Catalog reload failed, keeping current catalog: {e}", file=sys.stderr)
+            return False
+        self.on_change(catalog)
+        return True
+
+    def start(self) -> 'CatalogWatcher':
+        """Start polling on a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='catalog-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,318 @@
+"""
+Request metrics
+Per-method request and error counters, latency and payload-size histograms
+and an in-flight gauge, shared by both transports. Values live in one flat
+array of doubles, so recording a request is a few index updates under one
+lock, and the array can sit in shared memory to be summed across preforked
+worker processes. The in-flight gauge is derived from a count of requests
+started, which needs no lock. Work turned away by admission control is
+counted by reason, and result cache activity by event.
+"""
+
+import itertools
+import mmap
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .encoding import Fragment
+from .jsonrpc import INTERNAL_ERROR, INVALID_PARAMS, INVALID_REQUEST, METHOD_NOT_FOUND, PARSE_ERROR, SERVER_OVERLOADED
+
+# Methods with their own series; anything else is counted under OTHER
+METHODS = (
+    'initialize', 'resources/list', 'resources/read', 'prompts/list', 'prompts/get',
+    'prompts/search', 'prompts/renderBatch', 'tools/list', 'tools/call', 'completion/complete', 'server/stats',
+)
+BATCH = 'batch'
+INVALID = 'invalid'
+OTHER = 'other'
+
+# JSON-RPC error codes, then HTTP statuses from the per-method routes
+ERROR_CODES = (PARSE_ERROR, INVALID_REQUEST, METHOD_NOT_FOUND, INVALID_PARAMS, INTERNAL_ERROR,
+               SERVER_OVERLOADED, 400, 404, 413, 429, 500)
+
+# Why admission control turned a request away
+RATE_LIMITED = 'rate_limited'
+QUEUE_FULL = 'queue_full'
+TOO_LARGE = 'too_large'
+REJECT_REASONS = (RATE_LIMITED, QUEUE_FULL, TOO_LARGE)
+
+# Result cache counters, then its gauges, which hold the current size of each slot's cache
+CACHE_EVENTS = ('hits', 'misses', 'evictions', 'invalidations')
+CACHE_GAUGES = ('entries', 'bytes')
+
+# Histogram upper bounds; each histogram also has an implicit +Inf bucket
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# Offsets inside one method's block of values; the request count is the
+# latency histogram's total, so recording a request writes six values
+_LATENCY = 0
+_REQUEST_SIZE = _LATENCY + len(LATENCY_BUCKETS) + 2
+_RESPONSE_SIZE = _REQUEST_SIZE + len(SIZE_BUCKETS) + 2
+_ERRORS = _RESPONSE_SIZE + len(SIZE_BUCKETS) + 2
+_BLOCK = _ERRORS + len(ERROR_CODES) + 1
+
+_ERROR_OFFSETS = {code: _ERRORS + i for i, code in enumerate(ERROR_CODES)}
+_OTHER_ERROR = _ERRORS + len(ERROR_CODES)
+
+
+def _requests(values, base: int) -> int:
+    start = base + _LATENCY + 1
+    return int(sum(values[start:start + len(LATENCY_BUCKETS) + 1]))
+
+
+def request_method(message: Any) -> str:
+    """Metrics label for a parsed JSON-RPC message"""
+    if isinstance(message, dict):
+        method = message.get('method')
+        return method if isinstance(method, str) else INVALID
+    if isinstance(message, list):
+        return BATCH
+    return INVALID
+
+
+def _error_code(response: Any) -> Optional[int]:
+    if not isinstance(response, dict):
+        return None
+    error = response.get('error')
+    if error is None:
+        # The handlers report bad params inside the result
+        result = response.get('result')
+        if isinstance(result, dict):
+            error = result.get('error')
+    if isinstance(error, dict):
+        return error.get('code')
+    return None
+
+
+def error_codes(response: Any) -> Tuple[int, ...]:
+    """Error codes in a JSON-RPC response or batch of responses"""
+    if isinstance(response, list):
+        return tuple(code for code in map(_error_code, response) if code is not None)
+    code = _error_code(response)
+    return () if code is None else (code,)
+
+
+class Metrics:
+    """Request metrics for one server
+
+    With slots > 1 the values are kept in anonymous shared memory with one
+    region per slot. Create it before forking, have each worker bind() its
+    own slot, and any process can read the totals.
+    """
+
+    def __init__(self, methods: Sequence[str] = METHODS, slots: int = 1):
+        self.methods = tuple(methods) + (BATCH, INVALID, OTHER)
+        self.offsets = {method: i * _BLOCK for i, method in enumerate(self.methods)}
+        self.other = self.offsets[OTHER]
+        # Requests started follows the per-method blocks; started minus
+        # finished is the in-flight gauge. Rejections by reason and the
+        # result cache come last.
+        self.entered = len(self.methods) * _BLOCK
+        self.rejected = {reason: self.entered + 1 + i for i, reason in enumerate(REJECT_REASONS)}
+        cache = self.entered + 1 + len(REJECT_REASONS)
+        self.cache = {name: cache + i for i, name in enumerate(CACHE_EVENTS + CACHE_GAUGES)}
+        self.size = cache + len(self.cache)
+        self._entered = itertools.count(1)
+        self.slots = slots
+        if slots > 1:
+            self._shared = mmap.mmap(-1, slots * self.size * 8)
+            self.all = memoryview(self._shared).cast('d')
+            self.values = self.all[:self.size]
+        else:
+            self.all = self.values = array('d', bytes(self.size * 8))
+        self.lock = threading.Lock()
+
+    def bind(self, slot: int):
+        """Record into slot from now on; call once in each worker after fork"""
+        values = self.values = self.all[slot * self.size:(slot + 1) * self.size]
+        # Whatever a previous owner of the slot left in flight is gone with it
+        finished = sum(_requests(values, base) for base in self.offsets.values())
+        values[self.entered] = finished
+        self._entered = itertools.count(finished + 1)
+        # A new worker starts with an empty cache
+        for gauge in CACHE_GAUGES:
+            values[self.cache[gauge]] = 0
+        self.lock = threading.Lock()
+
+    def release(self, slot: int):
+        """Zero the gauges of slot once its worker has exited; call in the master after reaping it
+
+        Counters stay, so totals keep what the worker recorded, but its
+        cache is gone with it. Nothing else writes the slot until it is bound again.
+        """
+        base = slot * self.size
+        for gauge in CACHE_GAUGES:
+            self.all[base + self.cache[gauge]] = 0
+
+    def enter(self) -> float:
+        """Count a request as in flight; returns the start time to pass to observe()"""
+        # next() on a count is atomic under the GIL; concurrent stores can
+        # briefly leave an older value, which only skews the gauge until the next one
+        self.values[self.entered] = next(self._entered)
+        return time.perf_counter()
+
+    def observe(self, method: str, started: float, request_bytes: int, response_bytes: int,
+                codes: Iterable[int] = ()):
+        """Record a finished request that enter() started"""
+        seconds = time.perf_counter() - started
+        base = self.offsets.get(method, self.other)
+        latency = base + _LATENCY + 1 + bisect_left(LATENCY_BUCKETS, seconds)
+        request_size = base + _REQUEST_SIZE + 1 + bisect_left(SIZE_BUCKETS, request_bytes)
+        response_size = base + _RESPONSE_SIZE + 1 + bisect_left(SIZE_BUCKETS, response_bytes)
+        values = self.values
+        with self.lock:
+            values[base + _LATENCY] += seconds
+            values[latency] += 1
+            values[base + _REQUEST_SIZE] += request_bytes
+            values[request_size] += 1
+            values[base + _RESPONSE_SIZE] += response_bytes
+            values[response_size] += 1
+            for code in codes:
+                values[base + _ERROR_OFFSETS.get(code, _OTHER_ERROR)] += 1
+
+    def reject(self, reason: str):
+        """Count a request turned away for reason, one of REJECT_REASONS"""
+        with self.lock:
+            self.values[self.rejected[reason]] += 1
+
+    def cache_hit(self):
+        """Count one result cache hit; cache_events without the keyword handling, for the hot path"""
+        offset = self.cache['hits']
+        with self.lock:
+            self.values[offset] += 1
+
+    def cache_events(self, hits: int = 0, misses: int = 0, evictions: int = 0, invalidations: int = 0,
+                     entries: Optional[int] = None, size: Optional[int] = None):
+        """Count result cache events and, when given, set its entry and byte gauges"""
+        cache = self.cache
+        values = self.values
+        with self.lock:
+            values[cache['hits']] += hits
+            values[cache['misses']] += misses
+            values[cache['evictions']] += evictions
+            values[cache['invalidations']] += invalidations
+            if entries is not None:
+                values[cache['entries']] = entries
+                values[cache['bytes']] = size
+
+    def observe_stream(self, method: str, started: float, request_bytes: int,
+                       chunks: Iterable[List[Fragment]], codes: Iterable[int] = ()) -> Iterator[List[Fragment]]:
+        """Pass a streamed response through, recording it once the last chunk is out or the stream is dropped"""
+        response_bytes = 0
+        try:
+            for chunk in chunks:
+                response_bytes += sum(map(len, chunk))
+                yield chunk
+        finally:
+            self.observe(method, started, request_bytes, response_bytes, codes)
+
+    def observe_body(self, method: str, started: float, request_bytes: int,
+                     body: Iterable[bytes], codes: Iterable[int] = ()) -> Iterator[bytes]:
+        """observe_stream for a body of bytes, such as an HTTP response body as it is sent"""
+        response_bytes = 0
+        try:
+            for data in body:
+                response_bytes += len(data)
+                yield data
+        finally:
+            self.observe(method, started, request_bytes, response_bytes, codes)
+
+    def totals(self) -> List[float]:
+        """Values summed over every slot"""
+        if self.slots == 1:
+            return self.values.tolist()
+        size = self.size
+        flat = self.all.tolist()
+        return [sum(flat[i::size]) for i in range(size)]
+
+    @staticmethod
+    def _histogram(values: List[float], offset: int, bounds: Sequence[float]) -> Dict[str, Any]:
+        buckets = {}
+        cumulative = 0
+        for i, bound in enumerate(bounds):
+            cumulative += int(values[offset + 1 + i])
+            buckets[str(bound)] = cumulative
+        cumulative += int(values[offset + 1 + len(bounds)])
+        buckets['+Inf'] = cumulative
+        return {"sum": values[offset], "count": cumulative, "buckets": buckets}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals as plain JSON data, omitting methods that saw no requests"""
+        values = self.totals()
+        methods = {}
+        finished = 0
+        for method, base in self.offsets.items():
+            requests = _requests(values, base)
+            finished += requests
+            if not requests:
+                continue
+            errors = {str(code): int(values[base + offset])
+                      for code, offset in _ERROR_OFFSETS.items() if values[base + offset]}
+            if values[base + _OTHER_ERROR]:
+                errors[OTHER] = int(values[base + _OTHER_ERROR])
+            methods[method] = {
+                "requests": requests,
+                "errors": errors,
+                "latencySeconds": self._histogram(values, base + _LATENCY, LATENCY_BUCKETS),
+                "requestBytes": self._histogram(values, base + _REQUEST_SIZE, SIZE_BUCKETS),
+                "responseBytes": self._histogram(values, base + _RESPONSE_SIZE, SIZE_BUCKETS),
+            }
+        return {
+            "inFlight": max(0, int(values[self.entered]) - finished),
+            "rejected": {reason: int(values[offset]) for reason, offset in self.rejected.items()},
+            "cache": {name: int(values[offset]) for name, offset in self.cache.items()},
+            "methods": methods
+        }
+
+    def prometheus(self, prefix: str = 'mcp') -> str:
+        """Totals in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_in_flight_requests Requests being handled",
+            f"# TYPE {prefix}_in_flight_requests gauge",
+            f"{prefix}_in_flight_requests {snapshot['inFlight']}",
+            f"# HELP {prefix}_rejected_total Requests turned away by admission control, by reason",
+            f"# TYPE {prefix}_rejected_total counter",
+            *(f'{prefix}_rejected_total{{reason="{reason}"}} {count}'
+              for reason, count in snapshot['rejected'].items()),
+            f"# HELP {prefix}_cache_events_total Result cache lookups, evictions and invalidations, by event",
+            f"# TYPE {prefix}_cache_events_total counter",
+            *(f'{prefix}_cache_events_total{{event="{event}"}} {snapshot["cache"][event]}'
+              for event in CACHE_EVENTS),
+            f"# HELP {prefix}_cache_entries Results held in the result cache",
+            f"# TYPE {prefix}_cache_entries gauge",
+            f"{prefix}_cache_entries {snapshot['cache']['entries']}",
+            f"# HELP {prefix}_cache_bytes Bytes charged to the result cache",
+            f"# TYPE {prefix}_cache_bytes gauge",
+            f"{prefix}_cache_bytes {snapshot['cache']['bytes']}",
+            f"# HELP {prefix}_requests_total Requests handled, by method",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        methods = snapshot["methods"]
+        for method, stats in methods.items():
+            lines.append(f'{prefix}_requests_total{{method="{method}"}} {stats["requests"]}')
+
+        lines.append(f"# HELP {prefix}_errors_total Error responses, by method and JSON-RPC code or HTTP status")
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        for method, stats in methods.items():
+            for code, count in stats["errors"].items():
+                lines.append(f'{prefix}_errors_total{{method="{method}",code="{code}"}} {count}')
+
+        for key, name, help_text in (
+            ("latencySeconds", "request_duration_seconds", "Time to handle a request"),
+            ("requestBytes", "request_size_bytes", "Request payload size"),
+            ("responseBytes", "response_size_bytes", "Response payload size"),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for method, stats in methods.items():
+                histogram = stats[key]
+                for bound, count in histogram["buckets"].items():
+                    lines.append(f'{prefix}_{name}_bucket{{method="{method}",le="{bound}"}} {count}')
+                lines.append(f'{prefix}_{name}_sum{{method="{method}"}} {histogram["sum"]}')
+                lines.append(f'{prefix}_{name}_count{{method="{method}"}} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,435 @@
+"""
+Preforking WSGI server
+A master process builds shared state, opens the listening socket and forks
+worker processes that inherit both. Each worker serves keep-alive HTTP/1.1
+connections on a fixed-size thread pool. Connections waiting for a thread
+can be capped, with any beyond the cap answered at once with a canned 429.
+Unix only.
+"""
+
+import gc
+import os
+import selectors
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+from werkzeug.exceptions import InternalServerError
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import LimitedStream
+
+# Seconds a worker waits for in-flight requests when asked to stop
+GRACEFUL_TIMEOUT = 30.0
+
+# Seconds a refused connection is kept half-open to take the rest of its
+# request, so closing it does not reset the connection under the 429
+REFUSED_LINGER = 0.2
+
+# Refused connections lingering at once; past this the oldest is closed early
+MAX_LINGERING = 256
+
+# Request body bytes left unread by the app that are read and dropped to
+# keep the connection open; with more left the connection is closed
+MAX_DRAIN_BYTES = 64 * 1024
+
+# Most bytes of an unread request body taken in before closing its
+# connection, so the client sees the response rather than a reset
+MAX_DISCARD_BYTES = 10 * 1024 * 1024
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1 handler with an idle timeout and without per-request access logs"""
+
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections are closed after this many seconds
+    timeout = 5.0
+    access_log = False
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate sends; don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_request(self, code="-", size="-"):
+        if self.access_log:
+            super().log_request(code, size)
+
+    def run_wsgi(self):
+        """Run the app for one request, leaving the connection open for the next
+
+        Werkzeug's own run_wsgi sends Connection: close on every response,
+        as it cannot tell where an unread body ends and the next request
+        begins. Here the body is read through a stream limited to its
+        Content-Length, so whatever the app leaves unread, up to
+        MAX_DRAIN_BYTES, is drained after the response and the connection
+        stays open. Chunked bodies, larger remainders, a client asking to
+        close and a failure partway through a response close it.
+        """
+        # Expect: 100-continue was answered by parse_request, as for any HTTP/1.1 handler
+        self.environ = environ = self.make_environ()
+        length = environ.get("CONTENT_LENGTH", "0").strip() or "0"
+        if environ.get("wsgi.input_terminated") or not length.isdigit():
+            self.close_connection = True
+            body = None
+        else:
+            body = environ["wsgi.input"] = LimitedStream(self.rfile, int(length))
+        status_set: Optional[str] = None
+        headers_set: Optional[list] = None
+        headers_sent = False
+        chunked = False
+
+        def write(data: bytes):
+            nonlocal headers_sent, chunked
+            assert status_set is not None and headers_set is not None, "write() before start_response"
+            if not headers_sent:
+                headers_sent = True
+                code, _, message = status_set.partition(' ')
+                self.send_response(int(code), message)
+                keys = set()
+                for key, value in headers_set:
+                    self.send_header(key, value)
+                    keys.add(key.lower())
+                if not ("content-length" in keys or environ["REQUEST_METHOD"] == "HEAD"
+                        or int(code) < 200 or int(code) in (204, 304)):
+                    chunked = True
+                    self.send_header("Transfer-Encoding", "chunked")
+                if body is not None and body.limit - body.tell() > MAX_DRAIN_BYTES:
+                    self.close_connection = True
+                if self.close_connection:
+                    self.send_header("Connection", "close")
+                self.end_headers()
+            if data:
+                if chunked:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                else:
+                    self.wfile.write(data)
+            self.wfile.flush()
+
+        def start_response(status, headers, exc_info=None):
+            nonlocal status_set, headers_set
+            if exc_info:
+                try:
+                    if headers_sent:
+                        raise exc_info[1].with_traceback(exc_info[2])
+                finally:
+                    exc_info = None
+            elif headers_set:
+                raise AssertionError("Headers already set")
+            status_set, headers_set = status, headers
+            return write
+
+        def execute(app):
+            application_iter = app(environ, start_response)
+            try:
+                for data in application_iter:
+                    write(data)
+                if not headers_sent:
+                    write(b"")
+                if chunked:
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+            finally:
+                if hasattr(application_iter, "close"):
+                    application_iter.close()
+
+        try:
+            execute(self.server.app)
+        except (ConnectionError, socket.timeout) as e:
+            self.close_connection = True
+            self.connection_dropped(e, environ)
+            return
+        except Exception:
+            if self.server.passthrough_errors:
+                raise
+            # A response cut short can only be ended by closing the connection
+            self.close_connection = True
+            if not headers_sent:
+                status_set = headers_set = None
+                try:
+                    execute(InternalServerError())
+                except Exception:
+                    pass
+            self.server.log("error", f"Error on request:\n{traceback.format_exc()}")
+
+        if body is not None and not self.close_connection:
+            body.exhaust()
+        elif body is not None and not body.is_exhausted:
+            self._discard_unread()
+
+    def _discard_unread(self):
+        # Take in what the client has already sent of a body the app left
+        # unread, up to a limit, so closing does not reset the connection
+        # before the client has read the response
+        selector = selectors.DefaultSelector()
+        selector.register(self.connection, selectors.EVENT_READ)
+        taken = 0
+        try:
+            while taken < MAX_DISCARD_BYTES and selector.select(timeout=0.01):
+                data = self.rfile.read1(65536)
+                if not data:
+                    break
+                taken += len(data)
+        except OSError:
+            pass
+        finally:
+            selector.close()
+
+
+def overload_response(body: bytes) -> bytes:
+    """A complete HTTP 429 response carrying body, sent without reading the request"""
+    head = (f"HTTP/1.1 429 Too Many Requests\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nRetry-After: 1\r\nConnection: close\r\n\r\n")
+    return head.encode('ascii') + body
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug WSGI server on an inherited socket, one pooled thread per connection
+
+    With max_pending set, connections that would wait for a thread behind
+    max_pending others are refused with overload instead of queued, and
+    on_reject is called for each.
+    """
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, app, sock: socket.socket, threads: int, handler=KeepAliveRequestHandler,
+                 max_pending: Optional[int] = None, overload: bytes = b'',
+                 on_reject: Optional[Callable[[], None]] = None):
+        host, port = sock.getsockname()[:2]
+        super().__init__(host, port, app, handler=handler, fd=sock.fileno())
+        # Every worker wakes on a new connection and only one wins it; the
+        # others must get EAGAIN from accept() rather than block in it
+        self.socket.setblocking(False)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http-worker')
+        self.threads = threads
+        self.max_pending = max_pending
+        self.overload = overload
+        self.on_reject = on_reject
+        # Connections submitted to the pool that no thread has picked up yet
+        # or is still handling; only the excess over threads is waiting
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+        # (close after, socket) for refused connections, oldest first; only the serving thread touches it
+        self.lingering: Deque[Tuple[float, socket.socket]] = deque()
+
+    def process_request(self, request, client_address):
+        if self.max_pending is not None:
+            with self.pending_lock:
+                admitted = self.pending < self.threads + self.max_pending
+                if admitted:
+                    self.pending += 1
+            if not admitted:
+                self._refuse(request)
+                return
+        self.pool.submit(self._process_request_thread, request, client_address)
+
+    def _refuse(self, request):
+        try:
+            request.setblocking(False)
+            request.sendall(self.overload)
+            request.shutdown(socket.SHUT_WR)
+        except OSError:
+            request.close()
+        else:
+            self.lingering.append((time.monotonic() + REFUSED_LINGER, request))
+            if len(self.lingering) > MAX_LINGERING:
+                self._close_refused(self.lingering.popleft()[1])
+        if self.on_reject is not None:
+            self.on_reject()
+
+    @staticmethod
+    def _close_refused(request):
+        # Take whatever of the request has arrived; unread data would make close() send a reset
+        try:
+            while request.recv(65536):
+                pass
+        except OSError:
+            pass
+        request.close()
+
+    def service_actions(self):
+        # Called by serve_forever on every pass of its loop
+        now = time.monotonic()
+        while self.lingering and self.lingering[0][0] <= now:
+            self._close_refused(self.lingering.popleft()[1])
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            if self.max_pending is not None:
+                with self.pending_lock:
+                    self.pending -= 1
+
+
+def _run_worker(app, sock: socket.socket, threads: int, handler, max_pending: Optional[int],
+                overload: bytes, on_reject: Optional[Callable[[], None]]) -> int:
+    server = PooledWSGIServer(app, sock, threads, handler, max_pending, overload, on_reject)
+    master = os.getppid()
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever, so it must not run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    def watch_master():
+        # Don't outlive a master that was killed without a chance to stop us
+        while os.getppid() == master:
+            time.sleep(1.0)
+        server.shutdown()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    threading.Thread(target=watch_master, daemon=True).start()
+    server.serve_forever()
+
+    deadline = time.monotonic() + GRACEFUL_TIMEOUT
+    server.pool.shutdown(wait=False, cancel_futures=True)
+    for thread in list(getattr(server.pool, '_threads', ())):
+        thread.join(max(0.0, deadline - time.monotonic()))
+    return 0
+
+
+def serve(app, host: str = '0.0.0.0', port: int = 3000, workers: Optional[int] = None,
+          threads: int = 8, keepalive: float = 5.0, access_log: bool = False,
+          prepare: Optional[Callable[[], None]] = None,
+          check_reload: Optional[Callable[[], bool]] = None,
+          reload_interval: float = 1.0,
+          worker_init: Optional[Callable[[int], None]] = None,
+          worker_exit: Optional[Callable[[int], None]] = None,
+          max_pending: Optional[int] = None,
+          overload_body: bytes = b'',
+          on_reject: Optional[Callable[[], None]] = None):
+    """Serve app from workers preforked processes until SIGINT or SIGTERM
+
+    prepare runs in the master before each generation of workers is forked,
+    so whatever it builds is shared copy-on-write. check_reload is polled in
+    the master every reload_interval seconds; when it returns True, prepare
+    runs again, a new generation of workers is forked and the old one
+    finishes its in-flight requests and exits.
+
+    worker_init runs first thing in each worker with the worker's slot: a
+    number below 2 * workers that no other live worker holds, for indexing
+    per-worker regions of memory shared from the master. worker_exit runs
+    in the master with the slot of each worker it reaps, before the slot is
+    handed to another worker.
+
+    max_pending caps the connections each worker holds waiting for a free
+    thread; past it, connections get a 429 with overload_body straight
+    away and on_reject runs in the worker. None queues without limit.
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("The preforking server needs os.fork; use a WSGI server for this platform")
+
+    workers = workers or os.cpu_count() or 1
+    handler = type('RequestHandler', (KeepAliveRequestHandler,),
+                   {'timeout': keepalive, 'access_log': access_log})
+    sock = socket.create_server((host, port), backlog=2048, reuse_port=False)
+    sock.set_inheritable(True)
+
+    # Room for a draining generation alongside the current one
+    free_slots = list(range(2 * workers - 1, -1, -1))
+    slots: Dict[int, int] = {}
+
+    def spawn() -> int:
+        # Never empty: a worker replacing a crashed one takes its slot, and a
+        # new generation only starts once the one before the last has exited
+        slot = free_slots.pop()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                if worker_init is not None:
+                    worker_init(slot)
+                code = _run_worker(app, sock, threads, handler, max_pending,
+                                   overload_response(overload_body), on_reject)
+            finally:
+                os._exit(code)
+        slots[pid] = slot
+        return pid
+
+    def release(pid: int):
+        slot = slots.pop(pid, None)
+        if slot is not None:
+            if worker_exit is not None:
+                worker_exit(slot)
+            free_slots.append(slot)
+
+    def start_generation() -> Set[int]:
+        if prepare is not None:
+            prepare()
+        # Keep the cyclic GC from touching (and so un-sharing) everything built so far
+        gc.freeze()
+        return {spawn() for _ in range(workers)}
+
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    children = start_generation()
+    print(f"Serving on http://{host}:{port} with {workers} workers x {threads} threads", file=sys.stderr)
+    next_check = time.monotonic() + reload_interval
+    # A reload waiting for a draining generation to free its slots
+    reload_pending = False
+    try:
+        while not stopping.is_set():
+            stopping.wait(0.2)
+
+            # Reap exited workers; replace any that died unexpectedly
+            while True:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                release(pid)
+                if pid in children and not stopping.is_set():
+                    print(f"Worker {pid} exited with status {status}, restarting", file=sys.stderr)
+                    children.discard(pid)
+                    children.add(spawn())
+
+            if check_reload is not None and time.monotonic() >= next_check:
+                next_check = time.monotonic() + reload_interval
+                try:
+                    reloaded = check_reload()
+                except Exception as e:
+                    # A reload that fails in an unexpected way must not take down the master
+                    print(f"Catalog reload failed, keeping current workers: {e!r}", file=sys.stderr)
+                    reloaded = False
+                if reloaded and len(free_slots) < workers:
+                    print("Reload deferred until the previous generation of workers has exited", file=sys.stderr)
+                reload_pending = reload_pending or reloaded
+
+            # Forked from the latest catalog, however many reloads it waited through
+            if reload_pending and len(free_slots) >= workers:
+                reload_pending = False
+                old_children = children
+                children = start_generation()
+                for pid in old_children:
+                    os.kill(pid, signal.SIGTERM)
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        sock.close()
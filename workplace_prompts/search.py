@@ -0,0 +1,92 @@
+"""
+Prompt search
+Inverted index over prompt names, categories and text with BM25 ranking
+"""
+
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Too common to help ranking; skipping them keeps posting lists short
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the this to with".split()
+)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms, without stopwords"""
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+class SearchIndex:
+    """Inverted index with BM25 scoring
+
+    Documents are numbered in the order given. Each term maps to parallel
+    arrays of document numbers and term frequencies, so a query only touches
+    the postings of its own terms.
+    """
+
+    def __init__(self, documents: Iterable[str]):
+        postings: Dict[str, Tuple[array, array]] = {}
+        lengths = array('I')
+        for doc_id, text in enumerate(documents):
+            terms = tokenize(text)
+            lengths.append(len(terms))
+            for term, count in Counter(terms).items():
+                posting = postings.get(term)
+                if posting is None:
+                    posting = postings[term] = (array('I'), array('I'))
+                posting[0].append(doc_id)
+                posting[1].append(count)
+
+        self.postings = postings
+        self.size = len(lengths)
+        average = (sum(lengths) / self.size) if self.size else 0.0
+        # Per-document BM25 length normalisation, computed once
+        self.norms = array('d', (K1 * (1 - B + B * length / average) if average else K1
+                                 for length in lengths))
+
+    def state(self) -> Tuple[Dict[str, Tuple[bytes, bytes]], bytes]:
+        """Postings and norms as raw array bytes, for saving in a snapshot"""
+        postings = {term: (documents.tobytes(), frequencies.tobytes())
+                    for term, (documents, frequencies) in self.postings.items()}
+        return postings, self.norms.tobytes()
+
+    @classmethod
+    def from_state(cls, postings: Dict[str, Tuple[bytes, bytes]], norms: bytes) -> 'SearchIndex':
+        """An index restored from state() without retokenizing any document"""
+        index = cls(())
+        index.postings = {term: (array('I', documents), array('I', frequencies))
+                          for term, (documents, frequencies) in postings.items()}
+        index.norms = array('d', norms)
+        index.size = len(index.norms)
+        return index
+
+    def idf(self, term: str) -> float:
+        posting = self.postings.get(term)
+        frequency = len(posting[0]) if posting else 0
+        return math.log(1 + (self.size - frequency + 0.5) / (frequency + 0.5))
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Top documents for query as (document number, score), best first"""
+        scores: Dict[int, float] = {}
+        norms = self.norms
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            idf = self.idf(term)
+            get = scores.get
+            for doc_id, frequency in zip(*posting):
+                scores[doc_id] = get(doc_id, 0.0) + idf * frequency * (K1 + 1) / (frequency + norms[doc_id])
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
@@ -0,0 +1,225 @@
+"""
+Catalog snapshots
+A catalog saved together with everything derived from it: the packed list
+entries, their compressed first pages, the search index and where every
+prompt's placeholders are. Loading maps the file and decodes only a small
+index, so startup time hardly grows with the catalog. List pages are
+sliced out of the mapping, the search index is restored on first use and
+each prompt is decoded the first time it is asked for. Forked workers
+share the mapped file through the page cache.
+
+Snapshots are read with marshal and are as trusted as the code serving
+them. Build one from a JSON file, directory or SQLite store with:
+
+    python -m workplace_prompts.snapshot prompts.json catalog.snapshot
+"""
+
+import argparse
+import marshal
+import mmap
+import os
+import struct
+import sys
+from functools import cached_property
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from .catalog import (Catalog, ListIndex, PromptRecord, encode_json, pack_entries, prompt_entry, resource_entry,
+                      tool_entry)
+from .compression import ENCODINGS
+from .search import SearchIndex
+from .templates import CompiledTemplate
+
+# The first bytes of every snapshot; the last one is the format version
+MAGIC = b'WPSNAP\x00\x01'
+
+# Length of the marshalled index that follows MAGIC
+INDEX_LENGTH = struct.Struct('<Q')
+
+# Sections start on multiples of this so their offset arrays can be read in place
+ALIGNMENT = 8
+
+# List indexes saved in a snapshot: result key and entry builder
+LISTS = (('resources', resource_entry), ('prompts', prompt_entry), ('tools', tool_entry))
+
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def is_snapshot(path: str) -> bool:
+    """Whether path is a snapshot rather than a JSON catalog, a directory or a store"""
+    if os.path.isdir(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_snapshot(path: str, catalog: Catalog):
+    """Save catalog with every derived structure built to a new snapshot at path
+
+    Like write_store, the file is built next to path and renamed over it,
+    so a running server reloads it as a whole.
+    """
+    # Only snapshot writers need a temporary file
+    import tempfile
+
+    ids: Dict[str, int] = {}
+    blobs = []
+    for category, name, text in catalog.rows():
+        if '/' in category or '/' in name:
+            continue
+        ids[f"{category}/{name}"] = len(blobs)
+        blobs.append(marshal.dumps((category, name, text, CompiledTemplate(text).spans())))
+    # Records are packed like list entries; the separating commas are never read
+    records, record_offsets = pack_entries(blobs)
+    del blobs
+
+    sections = [('records', records), ('record_offsets', record_offsets.tobytes())]
+    compressed = {}
+    tags = {}
+    # Lists are packed straight from the metadata, without holding every entry dict
+    for key, build in LISTS:
+        packed, offsets = pack_entries(encode_json(build(*metadata)) for metadata in catalog.metadata())
+        index = ListIndex.from_packed(key, packed, offsets, catalog.page_size)
+        for coding in ENCODINGS:
+            index.first_page.encoded(coding)
+        sections += [(key, packed), (f'{key}_offsets', offsets.tobytes())]
+        compressed[key] = index.first_page.compressed
+        tags[key] = index.tag
+    sections.append(('search', marshal.dumps(catalog.search_index.state())))
+
+    layout = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = (position, len(data))
+        position = _aligned(position + len(data))
+    index_bytes = marshal.dumps({
+        'byteorder': sys.byteorder,
+        'page_size': catalog.page_size,
+        # Sorted, so the completion index is built from them in one pass
+        'ids': dict(sorted(ids.items())),
+        'sections': layout,
+        'compressed': compressed,
+        'tags': tags,
+    })
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(suffix='.snapshot', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            header = MAGIC + INDEX_LENGTH.pack(len(index_bytes)) + index_bytes
+            f.write(header + bytes(_aligned(len(header)) - len(header)))
+            for _, data in sections:
+                f.write(data)
+                f.write(bytes(_aligned(len(data)) - len(data)))
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class SnapshotCatalog(Catalog):
+    """A Catalog served from a memory-mapped snapshot
+
+    Each derived structure is restored from the file on first use, or all
+    at once by warm(), rather than rebuilt from the prompt text. Prompts
+    are decoded on first use and kept.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        start = len(MAGIC) + INDEX_LENGTH.size
+        try:
+            with open(path, 'rb') as f:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            if view[:len(MAGIC)] != MAGIC:
+                raise ValueError("not a catalog snapshot")
+            (length,) = INDEX_LENGTH.unpack_from(view, len(MAGIC))
+            index = marshal.loads(view[start:start + length])
+            if index['byteorder'] != sys.byteorder:
+                raise ValueError(f"written on a {index['byteorder']}-endian machine")
+            data = _aligned(start + length)
+            self._sections = {name: view[data + offset:data + offset + size]
+                              for name, (offset, size) in index['sections'].items()}
+            self.page_size: Optional[int] = index['page_size']
+            self.ids: Dict[str, int] = index['ids']
+            self._compressed: Dict[str, Dict[str, bytes]] = index['compressed']
+            # Snapshots written before lists were tagged have their lists hashed on first use
+            self._tags: Dict[str, str] = index.get('tags', {})
+            self._record_offsets = self._sections['record_offsets'].cast('Q')
+        except (EOFError, KeyError, TypeError, ValueError, struct.error) as e:
+            raise ValueError(f"{path}: unreadable snapshot: {e}")
+        self._records: Dict[str, PromptRecord] = {}
+
+    def _load_record(self, number: int) -> Tuple[str, str, str, Tuple[int, ...]]:
+        offsets = self._record_offsets
+        return marshal.loads(self._sections['records'][offsets[number]:offsets[number + 1] - 1])
+
+    def _list(self, key: str) -> ListIndex:
+        index = ListIndex.from_packed(key, self._sections[key], self._sections[f'{key}_offsets'].cast('Q'),
+                                      self.page_size, self._tags.get(key))
+        # Codings this process cannot produce are never asked for
+        index.first_page.compressed.update(self._compressed[key])
+        return index
+
+    @cached_property
+    def resources_list(self) -> ListIndex:
+        return self._list('resources')
+
+    @cached_property
+    def prompts_list(self) -> ListIndex:
+        return self._list('prompts')
+
+    @cached_property
+    def tools_list(self) -> ListIndex:
+        return self._list('tools')
+
+    @cached_property
+    def search_index(self) -> SearchIndex:
+        return SearchIndex.from_state(*marshal.loads(self._sections['search']))
+
+    @property
+    def prompts(self) -> Dict[str, Dict[str, str]]:
+        """The whole prompt table, decoded from the snapshot; for tools, not the request path"""
+        prompts: Dict[str, Dict[str, str]] = {}
+        for category, name, text in self.rows():
+            prompts.setdefault(category, {})[name] = text
+        return prompts
+
+    def names(self) -> Iterable[str]:
+        return self.ids.keys()
+
+    def rows(self) -> Iterator[Tuple[str, str, str]]:
+        for number in range(len(self._record_offsets) - 1):
+            category, name, text, _ = self._load_record(number)
+            yield category, name, text
+
+    def record(self, name: Any) -> Optional[PromptRecord]:
+        """The prompt called "category/name", decoded from the snapshot on first use"""
+        if not isinstance(name, str):
+            return None
+        record = self._records.get(name)
+        if record is None:
+            number = self.ids.get(name)
+            if number is None:
+                return None
+            category, prompt_name, text, spans = self._load_record(number)
+            # Racing threads may both decode; either record is correct
+            record = self._records[name] = PromptRecord(category, prompt_name, text, CompiledTemplate(text, spans))
+        return record
+
+
+def main():
+    from .loader import load_catalog
+
+    parser = argparse.ArgumentParser(description="Save a prompt catalog as a snapshot for fast startup")
+    parser.add_argument('source', help="JSON file, directory or SQLite store catalog")
+    parser.add_argument('snapshot', help="snapshot file to write")
+    args = parser.parse_args()
+    catalog = load_catalog(args.source)
+    write_snapshot(args.snapshot, catalog)
+    print(f"Wrote {len(catalog.prompts_list.entries)} prompts to {args.snapshot}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+SQLite catalog store
+A prompt catalog kept in a local SQLite file. Only the list metadata (names,
+descriptions and argument schemas) is held in memory; prompt text is read on
+demand for resources/read, prompts/get and tools/call and kept in a bounded
+LRU, so a process serving a million-prompt catalog holds the text of only
+the prompts it is actually asked for.
+
+Convert a JSON or directory catalog with:
+
+    python -m workplace_prompts.store prompts.json catalog.sqlite
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from functools import cached_property, lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from .catalog import (DEFAULT_PAGE_SIZE, Catalog, ListIndex, Metadata, PromptRecord, describe, encode_json,
+                      pack_entries, prompt_arguments, prompt_entry, resource_entry, tool_entry)
+
+# Prompts whose text and compiled template are kept per process
+TEXT_CACHE_SIZE = 4096
+
+# The first bytes of every SQLite database file
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+SCHEMA = '''
+CREATE TABLE prompts (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    arguments TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE UNIQUE INDEX prompts_category_name ON prompts (category, name);
+CREATE INDEX prompts_name ON prompts (name);
+'''
+
+
+def is_store(path: str) -> bool:
+    """Whether path is a SQLite file rather than a JSON catalog or a directory"""
+    if os.path.isdir(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+
+def write_store(path: str, prompts: Dict[str, Dict[str, str]]):
+    """Write a {category: {name: text}} table to a new SQLite store at path
+
+    The file is built next to path and renamed over it, so processes
+    reading the old store keep a consistent copy until they reload.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(suffix='.sqlite', dir=directory)
+    os.close(descriptor)
+    try:
+        connection = sqlite3.connect(temporary)
+        try:
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                'INSERT INTO prompts (category, name, description, arguments, text) VALUES (?, ?, ?, ?, ?)',
+                ((category, name, describe(text), json.dumps(prompt_arguments(text)), text)
+                 for category, category_prompts in prompts.items()
+                 for name, text in category_prompts.items()))
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class SQLiteCatalog(Catalog):
+    """A Catalog over a SQLite store, holding metadata in memory and text in an LRU
+
+    Each thread reads through its own read-only connection, opened on
+    first use; a forked worker opens fresh ones rather than sharing the
+    parent's.
+    """
+
+    def __init__(self, path: str, page_size: Optional[int] = DEFAULT_PAGE_SIZE,
+                 cache_size: int = TEXT_CACHE_SIZE):
+        self.path = path
+        self.page_size = page_size
+        self._local = threading.local()
+        # Prompts with the same arguments share one schema list
+        schemas: Dict[str, List[Dict[str, Any]]] = {}
+        self.ids: Dict[str, int] = {}
+        self._metadata: List[Metadata] = []
+        try:
+            for row_id, category, name, description, arguments in self._connection().execute(
+                    'SELECT id, category, name, description, arguments FROM prompts ORDER BY id'):
+                schema = schemas.get(arguments)
+                if schema is None:
+                    schema = schemas[arguments] = json.loads(arguments)
+                self._metadata.append((category, name, description, schema))
+                if '/' not in category and '/' not in name:
+                    self.ids[f"{category}/{name}"] = row_id
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            # Corrupt, half-written or foreign files fail like any other unreadable catalog
+            raise ValueError(f"{path}: unreadable store: {e}")
+        self._cached_record = lru_cache(maxsize=cache_size)(self._load_record)
+
+    def _connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = sqlite3.connect(f"file:{quote(os.path.abspath(self.path))}?mode=ro",
+                                               uri=True, check_same_thread=False)
+            local.pid = os.getpid()
+        return local.connection
+
+    def _load_record(self, row_id: int) -> PromptRecord:
+        category, name, text = self._connection().execute(
+            'SELECT category, name, text FROM prompts WHERE id = ?', (row_id,)).fetchone()
+        return PromptRecord(category, name, text)
+
+    def _list(self, key: str, build) -> ListIndex:
+        # Entries are encoded one at a time into a single buffer rather than held as dicts
+        packed, offsets = pack_entries(encode_json(build(*metadata)) for metadata in self._metadata)
+        return ListIndex.from_packed(key, packed, offsets, self.page_size)
+
+    @cached_property
+    def resources_list(self) -> ListIndex:
+        return self._list('resources', resource_entry)
+
+    @cached_property
+    def prompts_list(self) -> ListIndex:
+        return self._list('prompts', prompt_entry)
+
+    @cached_property
+    def tools_list(self) -> ListIndex:
+        return self._list('tools', tool_entry)
+
+    @property
+    def prompts(self) -> Dict[str, Dict[str, str]]:
+        """The whole prompt table, read from the store; for tools, not the request path"""
+        prompts: Dict[str, Dict[str, str]] = {}
+        for category, name, text in self.rows():
+            prompts.setdefault(category, {})[name] = text
+        return prompts
+
+    def rows(self) -> Iterator[Tuple[str, str, str]]:
+        return iter(self._connection().execute('SELECT category, name, text FROM prompts ORDER BY id'))
+
+    def names(self) -> Iterable[str]:
+        return self.ids.keys()
+
+    def metadata(self) -> Iterator[Metadata]:
+        return iter(self._metadata)
+
+    def record(self, name: Any) -> Optional[PromptRecord]:
+        """The prompt called "category/name", read from the store unless it is cached"""
+        row_id = self.ids.get(name) if isinstance(name, str) else None
+        if row_id is None:
+            return None
+        return self._cached_record(row_id)
+
+
+def main():
+    from .loader import load_prompts
+
+    parser = argparse.ArgumentParser(description="Convert a prompt catalog to a SQLite store")
+    parser.add_argument('source', help="JSON file or directory catalog")
+    parser.add_argument('store', help="SQLite file to write")
+    args = parser.parse_args()
+    prompts = load_prompts(args.source)
+    write_store(args.store, prompts)
+    print(f"Wrote {sum(map(len, prompts.values()))} prompts to {args.store}")
+
+
+if __name__ == '__main__':
+    main()
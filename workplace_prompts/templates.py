@@ -0,0 +1,90 @@
+"""
+Compiled prompt templates
+Templates are parsed once into literal segments and placeholder slots so
+rendering is a single join instead of one full-string replace per argument
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from .encoding import Fragment, kept_string_body, string_body
+
+# Bracketed slots such as [topic], [paste text] or
+# [audience type: executives, peers, or customers]
+PLACEHOLDER_PATTERN = re.compile(r'\[([^\[\]]+)\]')
+
+
+class CompiledTemplate:
+    """A prompt template split into literal segments and placeholder slots"""
+
+    __slots__ = ('text', 'head', 'slots', 'parts', 'encoded')
+
+    def __init__(self, text: str, spans: Optional[Sequence[int]] = None):
+        """Split text at its placeholders; spans from an earlier spans() call skip the scan"""
+        self.text = text
+        if spans is None:
+            spans = [offset for match in PLACEHOLDER_PATTERN.finditer(text) for offset in match.span()]
+        literals = []
+        slots = []
+        position = 0
+        for start, end in zip(spans[::2], spans[1::2]):
+            literals.append(text[position:start])
+            slots.append(text[start + 1:end - 1])
+            position = end
+        literals.append(text[position:])
+
+        self.head = literals[0]
+        self.slots: Tuple[str, ...] = tuple(slots)
+        # (argument name, unfilled placeholder text, literal that follows it)
+        self.parts: Tuple[Tuple[str, str, str], ...] = tuple(
+            (slot, f'[{slot}]', literal)
+            for slot, literal in zip(slots, literals[1:])
+        )
+        # JSON-escaped counterparts of the static pieces, built on first use
+        self.encoded = None
+
+    def spans(self) -> Tuple[int, ...]:
+        """Start and end offsets of every placeholder in text, flattened"""
+        offsets = []
+        position = len(self.head)
+        for _, placeholder, literal in self.parts:
+            offsets += (position, position + len(placeholder))
+            position += len(placeholder) + len(literal)
+        return tuple(offsets)
+
+    def render(self, arguments: Dict[str, Any]) -> str:
+        """Fill placeholders from arguments; unknown slots keep their brackets"""
+        if not arguments or not self.parts:
+            return self.text
+
+        pieces = [self.head]
+        append = pieces.append
+        get = arguments.get
+        for slot, placeholder, literal in self.parts:
+            append(str(get(slot, placeholder)))
+            append(literal)
+        return ''.join(pieces)
+
+    def render_encoded(self, arguments: Dict[str, Any]) -> List[Fragment]:
+        """render() as JSON string body fragments; static text is escaped only once"""
+        encoded = self.encoded
+        if encoded is None:
+            encoded = self.encoded = (
+                kept_string_body(self.text),
+                kept_string_body(self.head),
+                tuple((slot, kept_string_body(placeholder), kept_string_body(literal))
+                      for slot, placeholder, literal in self.parts)
+            )
+        if not arguments or not self.parts:
+            return [encoded[0]]
+
+        fragments = [encoded[1]]
+        append = fragments.append
+        for slot, placeholder, literal in encoded[2]:
+            if slot in arguments:
+                append(string_body(str(arguments[slot])))
+            else:
+                append(placeholder)
+            append(literal)
+        return fragments
+